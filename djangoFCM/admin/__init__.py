@@ -23,13 +23,14 @@ from django.contrib import admin
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.admin.sites import AlreadyRegistered
 
-from djangoFCM.admin.models import PushTokenAdmin, NotificationAdmin, ApplicationAdmin
-from djangoFCM.models import PushToken, Notification, Application
+from djangoFCM.admin.models import PushTokenAdmin, NotificationAdmin, ApplicationAdmin, NotificationDeliveryAdmin
+from djangoFCM.models import PushToken, Notification, Application, NotificationDelivery
 
 
 admin.site.register(Application, ApplicationAdmin)
 admin.site.register(PushToken, PushTokenAdmin)
 admin.site.register(Notification, NotificationAdmin)
+admin.site.register(NotificationDelivery, NotificationDeliveryAdmin)
 
 
 try:
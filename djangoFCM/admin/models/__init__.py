@@ -22,3 +22,4 @@
 from .application import ApplicationAdmin
 from .push_token import PushTokenAdmin
 from .notification import NotificationAdmin
+from .notification_delivery import NotificationDeliveryAdmin
@@ -19,10 +19,43 @@
 #  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
 # ******************************************************************************
 
+from django import forms
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
 
 
 class ApplicationAdmin(admin.ModelAdmin):
+    class CredentialsForm(forms.ModelForm):
+        """Write-only credentials: stored ones are never rendered, only replaced or cleared."""
+        new_credentials = forms.JSONField(
+            required=False,
+            label=_('new credentials'),
+            help_text=_('Transport options overriding project-wide ones for this application, '
+                        'e.g. {"api_key": ...} or {"client_id": ..., "client_secret": ...}. '
+                        'Leave empty to keep current credentials.'),
+            widget=forms.Textarea(attrs={'autocomplete': 'off', 'rows': 4}),
+        )
+        clear_credentials = forms.BooleanField(
+            required=False,
+            label=_('clear credentials'),
+        )
+
+        def clean_new_credentials(self):
+            credentials = self.cleaned_data['new_credentials']
+            if credentials is not None and not isinstance(credentials, dict):
+                raise forms.ValidationError(_('Credentials must be a JSON object.'))
+
+            return credentials
+
+        def save(self, commit=True):
+            if self.cleaned_data.get('clear_credentials'):
+                self.instance.credentials = None
+            elif self.cleaned_data.get('new_credentials'):
+                self.instance.credentials = self.cleaned_data['new_credentials']
+
+            return super().save(commit)
+
+    form = CredentialsForm
     fieldsets = (
         (
             None,
@@ -33,9 +66,29 @@ class ApplicationAdmin(admin.ModelAdmin):
                 )
             }
         ),
+        (
+            _('Credentials'),
+            {
+                'fields': (
+                    'credentials_status',
+                    'new_credentials',
+                    'clear_credentials',
+                ),
+                'classes': ('collapse',),
+            }
+        ),
     )
 
     list_display = ('name', 'messaging_service',)
     list_filter = ('messaging_service',)
+    readonly_fields = ('credentials_status',)
     search_fields = ('name',)
     ordering = ('name', 'messaging_service',)
+
+    @admin.display(description=_('credentials'))
+    def credentials_status(self, obj):
+        """Show which options are set, never their values."""
+        if not obj or not obj.credentials:
+            return _('not set')
+
+        return _('set: %(options)s') % {'options': ', '.join(sorted(obj.credentials))}
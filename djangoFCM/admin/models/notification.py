@@ -103,7 +103,6 @@ class NotificationAdmin(admin.ModelAdmin):
         FormSet = formset_factory(
             self.RecipientsComposerForm,
             extra=0,
-            max_num=1,
         )
         return FormSet(data)
 
@@ -118,7 +117,7 @@ class NotificationAdmin(admin.ModelAdmin):
                 raise Exception(formset.errors)
 
             for notification in queryset:
-                notification.recipients_composer_conditions = formset.cleaned_data
+                notification.composer_conditions = formset.cleaned_data
                 notification.save()
                 notification.compile_recipients()
 
@@ -33,7 +33,8 @@ class PushTokenAdmin(admin.ModelAdmin):
             {
                 'fields': (
                     'push_token',
-                    ('user', 'application',)
+                    ('user', 'application',),
+                    'is_active',
                 )
             }
         ),
@@ -43,16 +44,17 @@ class PushTokenAdmin(admin.ModelAdmin):
                 'fields': (
                     'creation_date',
                     'update_date',
+                    'invalidated_at',
                 )
             }
         ),
     )
 
-    list_display = ('short_token', 'user', 'application',)
-    list_filter = ('application',)
+    list_display = ('short_token', 'user', 'application', 'is_active',)
+    list_filter = ('application', 'is_active',)
     search_fields = ('push_token', 'user__username',)
     ordering = ('user', 'creation_date',)
-    readonly_fields = ('creation_date', 'update_date',)
+    readonly_fields = ('creation_date', 'update_date', 'invalidated_at',)
     autocomplete_fields = ('user',)
 
     def get_search_fields(self, request):
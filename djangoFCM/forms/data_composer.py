@@ -1,6 +1,13 @@
 from django import forms
+from django.conf import settings
 from django.db import models
 
+from djangoFCM.src.conditions import EXCLUDED_FIELDS, OPERATORS
+from djangoFCM.src.modelgraph import ModelGraphMemo
+
+# offer attributes of reverse relations (e.g. `notification__name`) in data composer
+COMPOSER_FOLLOW_REVERSE_RELATIONS = getattr(settings, 'DJANGOFCM_COMPOSER_FOLLOW_REVERSE_RELATIONS', False)
+
 
 class DynamicChoiceField(forms.ChoiceField):
 
@@ -11,6 +18,9 @@ class DynamicChoiceField(forms.ChoiceField):
 class DataComposerForm(forms.Form):
     model = None
     max_recursion_level = 2
+    follow_reverse_relations = COMPOSER_FOLLOW_REVERSE_RELATIONS
+
+    _attributes_memo = ModelGraphMemo()
     group_state = forms.ChoiceField(choices=(('OR', 'OR'), ('AND', 'AND')))
     attribute = forms.ChoiceField(
         required=True
@@ -29,11 +39,30 @@ class DataComposerForm(forms.Form):
     value_select.widget.attrs.update({'class': '--hidden'})
 
     def get_attributes_as_choices(self):
-
-        def get_model_fields(_model: models.Model, _recursion_level: int = 0, _previous_lookup: str = ''):
+        """
+        Return choices of `model` attribute lookups, following relations up to `max_recursion_level`.
+
+        Choices are computed once per (model, recursion level, reverse relations) and cached
+        on class until app registry changes.
+        """
+        return self._attributes_memo.get(
+            (self.model, self.max_recursion_level, self.follow_reverse_relations),
+            self.compute_attributes_as_choices,
+        )
+
+    def compute_attributes_as_choices(self):
+
+        def get_model_fields(
+                _model: models.Model,
+                _recursion_level: int = 0,
+                _previous_lookup: str = '',
+                _path: tuple = (),
+                _incoming=None,
+        ):
             if not _previous_lookup:
                 _previous_lookup = _model.__name__
             _recursion_level = _recursion_level + 1
+            _path = _path + (_model,)
             result = []
 
             model_fields = _model._meta._get_fields()
@@ -41,13 +70,25 @@ class DataComposerForm(forms.Form):
             for _field in model_fields:
                 _lookup = f'{_previous_lookup}.{_field.name}'
 
+                # relation just followed is never walked back
+                if _incoming is not None and _field.remote_field is _incoming:
+                    continue
+                if _field.name in EXCLUDED_FIELDS:
+                    continue
+
                 if isinstance(_field, models.ForeignKey):
                     result.append(_lookup)
 
                     if _recursion_level <= self.max_recursion_level:
-                        result.extend(get_model_fields(_field.related_model, _recursion_level, _lookup))
+                        result.extend(get_model_fields(_field.related_model, _recursion_level, _lookup, _path, _field))
                 elif isinstance(_field, models.ForeignObjectRel):
-                    continue
+                    # reverse relations do not enter models already on the path
+                    if not self.follow_reverse_relations or _field.related_model in _path:
+                        continue
+                    result.append(_lookup)
+
+                    if _recursion_level <= self.max_recursion_level:
+                        result.extend(get_model_fields(_field.related_model, _recursion_level, _lookup, _path, _field))
                 else:
                     result.append(_lookup)
 
@@ -59,7 +100,7 @@ class DataComposerForm(forms.Form):
 
     @staticmethod
     def get_operators_as_choices():
-        return ('is', 'is'),
+        return tuple((operator, operator) for operator in OPERATORS)
 
     def clean(self):
         data = super(DataComposerForm, self).clean()
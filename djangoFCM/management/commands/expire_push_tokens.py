@@ -0,0 +1,51 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from django.core.management.base import BaseCommand
+
+from djangoFCM.models import PushToken
+from djangoFCM.models.push_token.manager import DELETE_EXPIRED_TOKENS, EXPIRATION_CHUNK_SIZE, PUSH_TOKEN_TTL_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Deactivate or delete push tokens not refreshed for given number of days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=PUSH_TOKEN_TTL_DAYS,
+            help=f'Days since last refresh after which token expires (default: {PUSH_TOKEN_TTL_DAYS}).',
+        )
+        parser.add_argument(
+            '--delete', action='store_true', default=DELETE_EXPIRED_TOKENS,
+            help='Delete expired tokens instead of deactivating them.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPIRATION_CHUNK_SIZE,
+            help=f'Tokens processed per transaction (default: {EXPIRATION_CHUNK_SIZE}).',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Seconds to sleep between chunks.',
+        )
+
+    def handle(self, *args, days, delete, chunk_size, pause, **options):
+        affected = PushToken.objects.expire(days, delete, chunk_size, pause)
+        self.stdout.write(f'{"Deleted" if delete else "Deactivated"} {affected} expired push tokens.')
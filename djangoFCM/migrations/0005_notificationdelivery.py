@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0004_notification_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('S', 'success'), ('F', 'failure')], max_length=1, verbose_name='status')),
+                ('message_id', models.CharField(blank=True, max_length=255, verbose_name='provider message id')),
+                ('error_code', models.CharField(blank=True, max_length=63, verbose_name='error code')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now, verbose_name='timestamp')),
+                ('notification', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='djangoFCM.notification', verbose_name='notification')),
+                ('push_token', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='deliveries', to='djangoFCM.pushtoken', verbose_name='push token')),
+            ],
+            options={
+                'verbose_name': 'notification delivery',
+                'verbose_name_plural': 'notification deliveries',
+                'indexes': [models.Index(fields=['notification', 'status'], name='delivery_notification_status')],
+            },
+        ),
+    ]
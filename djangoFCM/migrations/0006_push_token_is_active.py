@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0005_notificationdelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushtoken',
+            name='invalidated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='invalidation date'),
+        ),
+        migrations.AddField(
+            model_name='pushtoken',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='is active'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:38
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+COMPOSER_CONDITIONS_VERSION = 1
+BATCH_SIZE = 1000
+
+
+def normalize_conditions(conditions):
+    # frozen copy of djangoFCM.src.conditions.normalize_conditions
+    result = []
+
+    for condition in conditions or ():
+        if not condition:
+            continue
+
+        if 'conditions' in condition:
+            normalized = {'conditions': normalize_conditions(condition['conditions'])}
+        else:
+            value = condition.get('value')
+            normalized = {
+                'attribute': condition['attribute'],
+                'operator': condition.get('operator') or 'is',
+                'value': '' if value is None else str(value),
+            }
+        if result:
+            normalized['group_state'] = condition.get('group_state') or 'AND'
+
+        result.append(normalized)
+
+    return result
+
+
+def pickled_to_json(apps, schema_editor):
+    Notification = apps.get_model('djangoFCM', 'Notification')
+
+    batch = []
+    for notification in Notification.objects.exclude(recipients_composer_conditions=None).iterator():
+        conditions = normalize_conditions(notification.recipients_composer_conditions)
+        if not conditions:
+            continue
+
+        notification.recipients_composer_conditions_json = {
+            'version': COMPOSER_CONDITIONS_VERSION,
+            'conditions': conditions,
+        }
+        notification.recipients_composer_hash = hashlib.sha256(
+            json.dumps(conditions, sort_keys=True, separators=(',', ':')).encode()
+        ).hexdigest()
+        batch.append(notification)
+
+        if len(batch) >= BATCH_SIZE:
+            Notification.objects.bulk_update(batch, ('recipients_composer_conditions_json', 'recipients_composer_hash'))
+            batch = []
+
+    Notification.objects.bulk_update(batch, ('recipients_composer_conditions_json', 'recipients_composer_hash'))
+
+
+def json_to_pickled(apps, schema_editor):
+    Notification = apps.get_model('djangoFCM', 'Notification')
+
+    batch = []
+    for notification in Notification.objects.exclude(recipients_composer_conditions_json=None).iterator():
+        notification.recipients_composer_conditions = notification.recipients_composer_conditions_json['conditions']
+        batch.append(notification)
+
+        if len(batch) >= BATCH_SIZE:
+            Notification.objects.bulk_update(batch, ('recipients_composer_conditions',))
+            batch = []
+
+    Notification.objects.bulk_update(batch, ('recipients_composer_conditions',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0006_push_token_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='recipients_composer_conditions_json',
+            field=models.JSONField(editable=False, null=True, verbose_name='recipients composer conditions'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recipients_composer_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='recipients composer conditions hash'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recipients_compiled_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='recipients compilation date'),
+        ),
+        migrations.RunPython(pickled_to_json, json_to_pickled),
+        migrations.RemoveField(
+            model_name='notification',
+            name='recipients_composer_conditions',
+        ),
+        migrations.RenameField(
+            model_name='notification',
+            old_name='recipients_composer_conditions_json',
+            new_name='recipients_composer_conditions',
+        ),
+    ]
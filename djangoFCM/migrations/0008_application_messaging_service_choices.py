@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0007_recipients_composer_conditions_json'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='messaging_service',
+            field=models.CharField(choices=[('F', 'Firebase Cloud Messaging'), ('H', 'Huawei Mobile Services'), ('A', 'Apple Push Notification service'), ('D', 'Dummy (recording only)')], default='F', max_length=1, verbose_name='messaging service'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0008_application_messaging_service_choices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='credentials',
+            field=models.JSONField(blank=True, help_text='Transport options overriding project-wide ones for this application, e.g. {"api_key": ...} or {"client_id": ..., "client_secret": ...}', null=True, verbose_name='credentials'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0009_application_credentials'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationSendRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lower', models.CharField(blank=True, max_length=255, null=True, verbose_name='lower bound (exclusive)')),
+                ('upper', models.CharField(blank=True, max_length=255, null=True, verbose_name='upper bound (inclusive)')),
+                ('checkpoint', models.JSONField(blank=True, null=True, verbose_name='checkpoint')),
+                ('completed', models.BooleanField(default=False, verbose_name='completed')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='updated on')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='send_ranges', to='djangoFCM.notification', verbose_name='notification')),
+            ],
+            options={
+                'verbose_name': 'notification send range',
+                'verbose_name_plural': 'notification send ranges',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+def flag_scheduled(apps, schema_editor):
+    Notification = apps.get_model('djangoFCM', 'Notification')
+    Notification.objects.filter(task__isnull=False).update(scheduled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0010_notificationsendrange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dispatched_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='dispatch date'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='scheduled',
+            field=models.BooleanField(default=False, editable=False, verbose_name='is scheduled'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['sent', 'send_on'], name='notification_due'),
+        ),
+        migrations.RunPython(flag_scheduled, migrations.RunPython.noop),
+    ]
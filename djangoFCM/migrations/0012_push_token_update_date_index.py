@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0011_notification_dispatch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pushtoken',
+            index=models.Index(fields=['update_date'], name='push_token_update_date'),
+        ),
+    ]
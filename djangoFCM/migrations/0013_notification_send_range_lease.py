@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoFCM', '0012_push_token_update_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationsendrange',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=32, verbose_name='claimed by'),
+        ),
+        migrations.AddField(
+            model_name='notificationsendrange',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='claimed until'),
+        ),
+    ]
@@ -22,3 +22,5 @@
 from .application import Application
 from .push_token import PushToken
 from .notification import Notification, NotificationArgument
+from .notification_delivery import NotificationDelivery
+from .notification_send_range import NotificationSendRange
@@ -23,13 +23,15 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 
-from djangoFCM.models.push_token.manager import Manager
+from djangoFCM.models.application.manager import Manager
 
 
 class Application(models.Model):
     class MessagingService(models.TextChoices):
         FCM = 'F', _('Firebase Cloud Messaging')
         HMS = 'H', _('Huawei Mobile Services')
+        APNS = 'A', _('Apple Push Notification service')
+        DUMMY = 'D', _('Dummy (recording only)')
 
     name = models.CharField(
         max_length=63,
@@ -45,6 +47,13 @@ class Application(models.Model):
         choices=MessagingService.choices,
         default=MessagingService.FCM
     )
+    credentials = models.JSONField(
+        blank=True,
+        null=True,
+        verbose_name=_('credentials'),
+        help_text=_('Transport options overriding project-wide ones for this application, '
+                    'e.g. {"api_key": ...} or {"client_id": ..., "client_secret": ...}'),
+    )
 
     objects = Manager()
 
@@ -19,8 +19,134 @@
 #  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
 # ******************************************************************************
 
-from django.db import models
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django_celery_beat.models import ClockedSchedule, PeriodicTask, PeriodicTasks
+
+# schedule notifications by polling `dispatch_push_notifications` task instead of per-notification beat tasks
+USE_DISPATCHER = getattr(settings, 'DJANGOFCM_USE_DISPATCHER', False)
+# store composed recipients in `Notification.recipients`, otherwise resolve conditions at send time
+MATERIALIZE_RECIPIENTS = getattr(settings, 'DJANGOFCM_MATERIALIZE_RECIPIENTS', True)
+# seconds after which notification dispatched but still not sent may be dispatched again
+DISPATCH_CLAIM_TIMEOUT = getattr(settings, 'DJANGOFCM_DISPATCH_CLAIM_TIMEOUT', 3600)
 
 
 class Manager(models.Manager):
-    pass
+    def reconcile_schedules(self, notification_pks):
+        """
+        Schedule unsent notifications with recipients, unschedule ones without, in bulk.
+
+        Costs fixed number of queries regardless of number of notifications, except for
+        beat's change notifications sent per deleted task.
+        With `DJANGOFCM_MATERIALIZE_RECIPIENTS` disabled notifications with composer conditions
+        are considered to have recipients, as those are resolved only at send time.
+        """
+        has_recipients = models.Q(models.Exists(
+            self.model.recipients.through.objects.filter(notification=models.OuterRef('pk'))
+        ))
+        if not MATERIALIZE_RECIPIENTS:
+            has_recipients |= models.Q(recipients_composer_conditions__isnull=False)
+        notifications = self.filter(pk__in=list(notification_pks), sent=False)
+
+        self.unschedule_many(notifications.filter(scheduled=True).exclude(has_recipients))
+        self.schedule_many(notifications.filter(scheduled=False).filter(has_recipients))
+
+    def schedule_many(self, notifications):
+        """
+        Bulk version of `Notification.schedule()`.
+
+        Clocks, tasks and notifications are written in single transaction, so no task is left
+        behind unlinked (and blocking rescheduling by its unique name) when sending fails midway.
+        """
+        with transaction.atomic(using=self.db):
+            self._schedule_many(notifications)
+
+    def _schedule_many(self, notifications):
+        notifications = list(notifications.only('pk', 'name', 'send_on'))
+        if not notifications:
+            return
+
+        if USE_DISPATCHER:
+            self.filter(pk__in=[notification.pk for notification in notifications]).update(scheduled=True)
+            return
+
+        clocks = {}
+        send_ons = {notification.send_on for notification in notifications}
+        for clock in ClockedSchedule.objects.filter(clocked_time__in=send_ons):
+            clocks.setdefault(clock.clocked_time, clock)
+        ClockedSchedule.objects.bulk_create([
+            clocks.setdefault(send_on, ClockedSchedule(clocked_time=send_on))
+            for send_on in send_ons - clocks.keys()
+        ])
+        if any(clock.pk is None for clock in clocks.values()):
+            # backend does not return primary keys from bulk insert
+            clocks = {}
+            for clock in ClockedSchedule.objects.filter(clocked_time__in=send_ons).order_by('pk'):
+                clocks.setdefault(clock.clocked_time, clock)
+
+        tasks = {
+            notification.pk: PeriodicTask(
+                name=f'Send {notification.name}(pk={notification.pk})',
+                task='djangoFCM.tasks.send_push_notification',
+                clocked=clocks[notification.send_on],
+                one_off=True,
+                kwargs=json.dumps({
+                    'notification_pk': notification.pk
+                }),
+            )
+            for notification in notifications
+        }
+        PeriodicTask.objects.bulk_create(tasks.values())
+        # bulk insert sends no signals, let beat know about new tasks explicitly
+        PeriodicTasks.update_changed()
+        task_pks = dict(
+            PeriodicTask.objects.filter(name__in=[task.name for task in tasks.values()]).values_list('name', 'pk')
+        )
+
+        for notification in notifications:
+            notification.task_id = task_pks[tasks[notification.pk].name]
+            notification.scheduled = True
+        self.bulk_update(notifications, ('task', 'scheduled'))
+
+    def unschedule_many(self, notifications):
+        """Bulk version of `Notification.unschedule()`."""
+        with transaction.atomic(using=self.db):
+            notifications = list(notifications.values_list('pk', 'task'))
+            if not notifications:
+                return
+
+            self.filter(pk__in=[pk for pk, _ in notifications]).update(scheduled=False, task=None)
+
+            task_pks = [task_pk for _, task_pk in notifications if task_pk is not None]
+            if task_pks:
+                # deletion signals let beat know about removed tasks
+                PeriodicTask.objects.db_manager(self.db).filter(pk__in=task_pks).delete()
+
+    def claim_due(self, limit):
+        """
+        Mark at most `limit` scheduled notifications due to be sent as dispatched, return their pks.
+
+        Rows are locked with `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent dispatchers
+        never claim the same notification. Claims older than `DISPATCH_CLAIM_TIMEOUT`
+        are considered lost and are taken over.
+        """
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            pks = list(
+                self.select_for_update(skip_locked=True)
+                .filter(sent=False, scheduled=True, send_on__lte=now)
+                .filter(
+                    models.Q(dispatched_on__isnull=True)
+                    | models.Q(dispatched_on__lt=now - timedelta(seconds=DISPATCH_CLAIM_TIMEOUT))
+                )
+                .order_by('send_on')
+                .values_list('pk', flat=True)[:limit]
+            )
+            if pks:
+                self.filter(pk__in=pks).update(dispatched_on=now)
+
+        return pks
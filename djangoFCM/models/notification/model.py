@@ -20,19 +20,48 @@
 # ******************************************************************************
 
 import json
-
-from django.db import models
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, connections, router, transaction
 from django.utils.translation import gettext_lazy as _
 from django_celery_beat.models import PeriodicTask, ClockedSchedule
 from django.utils import timezone
 from django.db.models.signals import m2m_changed, post_delete
 from django.dispatch import receiver
-from picklefield import PickledObjectField
 from django.contrib.auth import get_user_model
 
-from djangoFCM.models.notification.manager import Manager
+from djangoFCM.models.notification.manager import Manager, MATERIALIZE_RECIPIENTS, USE_DISPATCHER
 from djangoFCM.models.push_token import PushToken
-from djangoFCM.src import fcm_app, hms_app
+from djangoFCM.src.transports import get_backend, rate_limiter
+from djangoFCM.src.batching import iter_batches
+from djangoFCM.src.calendar import invalidate_calendar
+from djangoFCM.src.conditions import filter_by_conditions, normalize_conditions, hash_conditions
+from djangoFCM.src.delivery import BACKEND_UNAVAILABLE, DeliveryResult
+
+logger = logging.getLogger(__name__)
+
+LOG_DELIVERIES = getattr(settings, 'DJANGOFCM_LOG_DELIVERIES', True)
+# rows fetched from database cursor at once while streaming recipients
+RECIPIENTS_CHUNK_SIZE = getattr(settings, 'DJANGOFCM_RECIPIENTS_CHUNK_SIZE', 2000)
+# seconds during which recipients compiled for one notification are reused by another one with same conditions
+RECIPIENTS_REUSE_TIMEOUT = getattr(settings, 'DJANGOFCM_RECIPIENTS_REUSE_TIMEOUT', 60)
+
+# attempts to resend tokens of batch failed with transient error, with jittered exponential backoff
+SEND_MAX_RETRIES = getattr(settings, 'DJANGOFCM_SEND_MAX_RETRIES', 3)
+# seconds, base and cap of backoff between resend attempts
+SEND_RETRY_BACKOFF = getattr(settings, 'DJANGOFCM_SEND_RETRY_BACKOFF', 1.0)
+SEND_RETRY_BACKOFF_MAX = getattr(settings, 'DJANGOFCM_SEND_RETRY_BACKOFF_MAX', 60.0)
+
+# version of `Notification.recipients_composer_conditions` document
+COMPOSER_CONDITIONS_VERSION = 1
 
 
 class Notification(models.Model):
@@ -40,6 +69,15 @@ class Notification(models.Model):
         verbose_name = _('notification')
         verbose_name_plural = _('notifications')
         constraints = []
+        indexes = (
+            models.Index(
+                fields=(
+                    'sent',
+                    'send_on',
+                ),
+                name='notification_due',
+            ),
+        )
 
     name = models.CharField(
         max_length=63,
@@ -69,10 +107,24 @@ class Notification(models.Model):
         verbose_name=_('recipients'),
         blank=True,
     )
-    recipients_composer_conditions = PickledObjectField(
+    recipients_composer_conditions = models.JSONField(
         null=True,
+        editable=False,
         verbose_name=_('recipients composer conditions'),
     )
+    recipients_composer_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('recipients composer conditions hash'),
+    )
+    recipients_compiled_on = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('recipients compilation date'),
+    )
     __original_send_on = None
     send_on = models.DateTimeField(
         null=False,
@@ -86,6 +138,19 @@ class Notification(models.Model):
         verbose_name=_('is sent'),
         default=False,
     )
+    scheduled = models.BooleanField(
+        null=False,
+        blank=False,
+        editable=False,
+        verbose_name=_('is scheduled'),
+        default=False,
+    )
+    dispatched_on = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('dispatch date'),
+    )
     creation_date = models.DateTimeField(
         auto_now_add=True,
         blank=False,
@@ -121,130 +186,410 @@ class Notification(models.Model):
             # 'send_on' was changed, therefore task is obsolete
             self.task.delete()
             self.task = None
+            self.scheduled = False
+
+        conditions = self.composer_conditions
+        self.recipients_composer_hash = hash_conditions(conditions) if conditions else ''
 
         super().save(force_insert, force_update, using, update_fields)
+        invalidate_calendar(self.__original_send_on, self.send_on)
         self.__original_send_on = self.send_on
 
-    def compile_recipients(self):
+    @property
+    def composer_conditions(self):
+        """List of composer conditions stored in versioned `recipients_composer_conditions` document."""
         if not self.recipients_composer_conditions:
-            self.recipients.clear()
-            return
+            return []
 
-        if len(self.recipients_composer_conditions) == 1:
-            condition = self.recipients_composer_conditions[0]
-            self.recipients.set(
-                PushToken.objects.filter(
-                    **{
-                        condition['attribute']: condition['value']
-                    }
-                )
-            )
-        else:
-            raise NotImplementedError
+        return self.recipients_composer_conditions['conditions']
 
-    def send(self):
+    @composer_conditions.setter
+    def composer_conditions(self, conditions):
+        conditions = normalize_conditions(conditions)
+        self.recipients_composer_conditions = {
+            'version': COMPOSER_CONDITIONS_VERSION,
+            'conditions': conditions,
+        } if conditions else None
 
-        (FCM_tokens, HMS_tokens) = (
-            list(self.recipients.filter(application__messaging_service='F').values_list('push_token', flat=True)),
-            list(self.recipients.filter(application__messaging_service='H').values_list('push_token', flat=True)),
-        )
-        kwargs = {k: v for k, v in self.arguments.all().values_list('key', 'value')}
+    def get_composed_recipients(self):
+        """Return push tokens matching `composer_conditions`."""
+        if not self.composer_conditions:
+            return PushToken.objects.none()
 
-        if FCM_tokens:
-            fcm_app.notify_multiple_devices(
-                registration_ids=FCM_tokens,
-                message_title=self.title,
-                message_body=self.body,
-                extra_notification_kwargs=kwargs,
-            )
-        if HMS_tokens:
-            hms_app.notify_multiple_devices(
-                registration_ids=FCM_tokens,
-                message_title=self.title,
-                message_body=self.body,
-                data=kwargs,
-            )
-
-        self.send_on = timezone.now()
-        self.sent = True
-        self.save()
+        return filter_by_conditions(PushToken.objects.all(), self.composer_conditions)
 
+    def get_recipients(self):
+        if self.composer_conditions and not MATERIALIZE_RECIPIENTS:
+            return self.get_composed_recipients()
 
-@receiver(post_delete, sender=Notification)
-def notification_deleted_handler(sender, instance, using, **kwargs):
-    if instance.task:
-        instance.task.delete()
+        return self.recipients.all()
 
+    def compile_recipients(self):
+        """
+        Store push tokens matching `composer_conditions` as `recipients`.
+
+        If notification with identical conditions was compiled less than `DJANGOFCM_RECIPIENTS_REUSE_TIMEOUT`
+        seconds ago, its recipients are copied instead of evaluating conditions again.
+        Through table is rewritten with set-based `DELETE` and `INSERT ... SELECT` statements
+        inside a transaction, so matching push tokens are never loaded into Python and
+        `m2m_changed` is not sent; the task is (un)scheduled explicitly instead.
+        With `DJANGOFCM_MATERIALIZE_RECIPIENTS` disabled only the task is (un)scheduled.
+        """
+        if MATERIALIZE_RECIPIENTS:
+            through = Notification.recipients.through
+            using = router.db_for_write(through, instance=self)
+            connection = connections[using]
+            # queryset is used unevaluated, truth test would fetch every reused token
+            reusable_recipients = self.get_reusable_recipients()
+            composed_recipients = (
+                reusable_recipients if reusable_recipients is not None else self.get_composed_recipients()
+            ).using(using)
+
+            with transaction.atomic(using=using):
+                through.objects.using(using).filter(
+                    notification=self,
+                ).exclude(
+                    pushtoken__in=composed_recipients.values('pk'),
+                ).delete()
+
+                new_recipients = composed_recipients.exclude(
+                    pk__in=through.objects.using(using).filter(notification=self).values('pushtoken'),
+                ).order_by().values('pk')
+                if self.composer_conditions:
+                    sql, params = new_recipients.query.sql_with_params()
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            'INSERT INTO {table} ({notification}, {push_token}) '
+                            'SELECT %s, {pk} FROM ({sql}) composed_recipients'.format(
+                                table=connection.ops.quote_name(through._meta.db_table),
+                                notification=connection.ops.quote_name(through._meta.get_field('notification').column),
+                                push_token=connection.ops.quote_name(through._meta.get_field('pushtoken').column),
+                                pk=connection.ops.quote_name(PushToken._meta.pk.column),
+                                sql=sql,
+                            ),
+                            (self.pk, *params),
+                        )
+
+            self.recipients_compiled_on = timezone.now()
+            self.save(update_fields=('recipients_compiled_on',))
+            # recipients edited earlier in the same transaction were just overwritten
+            pending = getattr(_pending_reconciliations, using, None)
+            if pending is not None:
+                pending.edited_pks.discard(self.pk)
+
+        self.reconcile_task()
+
+    def get_reusable_recipients(self):
+        """
+        Return unevaluated queryset of recipients of recently compiled notification with same conditions, or `None`.
+
+        Recipients edited by hand after compilation reset `recipients_compiled_on`,
+        so such notification is never used as source.
+        """
+        if not self.recipients_composer_hash or not RECIPIENTS_REUSE_TIMEOUT:
+            return None
+
+        source = Notification.objects.exclude(pk=self.pk).filter(
+            recipients_composer_hash=self.recipients_composer_hash,
+            recipients_compiled_on__gte=timezone.now() - timedelta(seconds=RECIPIENTS_REUSE_TIMEOUT),
+        ).order_by('-recipients_compiled_on').first()
+        if not source:
+            return None
+
+        return PushToken.objects.filter(notifications=source)
+
+    def schedule(self):
+        """
+        Schedule sending notification at `send_on`.
+
+        Creates one-off beat task, or, with `DJANGOFCM_USE_DISPATCHER`, only flags notification
+        for `dispatch_push_notifications` to pick it up when due.
+        """
+        self.scheduled = True
+        if USE_DISPATCHER:
+            self.save()
+            return
 
-@receiver(m2m_changed, sender=Notification.recipients.through)
-def recipients_changed_handler(sender, instance, action, reverse, pk_set, **kwargs):
-    def _add_task(_instance: Notification):
         clock, _ = ClockedSchedule.objects.get_or_create(
-            clocked_time=_instance.send_on
+            clocked_time=self.send_on
         )
 
         task = PeriodicTask.objects.create(
-            name=f'Send {_instance.name}(pk={_instance.pk})',
+            name=f'Send {self.name}(pk={self.pk})',
             task=f'djangoFCM.tasks.send_push_notification',
             clocked=clock,
             one_off=True,
             kwargs=json.dumps({
-                'notification_pk': _instance.pk
+                'notification_pk': self.pk
             })
         )
-        _instance.task = task
+        self.task = task
 
-        _instance.save()
+        self.save()
         # save to set 'task' value
 
-    def _delete_task(_instance: Notification):
-        if _instance.task:
-            _instance.task.delete()
-            _instance.task = None
-            _instance.save()
+    def unschedule(self):
+        if self.task:
+            self.task.delete()
+            self.task = None
+            self.scheduled = False
+            self.save()
+        elif self.scheduled:
+            self.scheduled = False
+            self.save()
+
+    def reconcile_task(self):
+        """Schedule unsent notification with recipients, unschedule notification without ones."""
+        if not self.get_recipients().exists():
+            self.unschedule()
+        elif not self.sent and not self.scheduled:
+            self.schedule()
+
+    def get_recipients_range(self, lower=None, upper=None):
+        """Return active recipients with `push_token` in (`lower`, `upper`]; `None` leaves a side unbounded."""
+        recipients = self.get_recipients().filter(is_active=True)
+        if lower is not None:
+            recipients = recipients.filter(push_token__gt=lower)
+        if upper is not None:
+            recipients = recipients.filter(push_token__lte=upper)
+
+        return recipients
+
+    def get_recipients_ranges(self, range_size):
+        """
+        Split recipients into consecutive (`lower`, `upper`] ranges of `push_token` of at most `range_size` tokens.
+
+        Bounds are found with keyset pagination, so each range costs a single indexed query
+        and tokens themselves are never loaded. The last range is open-ended (`upper` is `None`).
+        """
+        lower = None
+        while True:
+            recipients = self.get_recipients_range(lower).order_by('push_token').values_list('push_token', flat=True)
+            upper = next(iter(recipients[range_size - 1:range_size]), None)
+            if upper is None:
+                if recipients.exists():
+                    yield lower, None
+                return
+
+            yield lower, upper
+            lower = upper
+
+    def send(self, progress_callback=None):
+        """
+        Send to all recipients and mark notification as sent.
+
+        Progress is checkpointed in `NotificationSendRange`, so calling it again after
+        interruption resumes sending instead of starting over.
+        `progress_callback`, if given, is called as `progress_callback(processed, total)` after every batch.
+        """
+        from djangoFCM.models.notification_send_range import NotificationSendRange
+
+        for send_range in NotificationSendRange.objects.plan(self):
+            send_range.send(progress_callback=progress_callback)
+        self.mark_sent()
+
+    def send_range(self, lower=None, upper=None, progress_callback=None, checkpoint=None, checkpoint_callback=None,
+                   keepalive=None):
+        """
+        Stream recipients of (`lower`, `upper`] range in provider-sized batches and dispatch each batch independently.
+
+        Recipients are read by single query ordered by messaging service and application,
+        every group is sent by backend of its messaging service using backend's batch size
+        and application's own credentials, if any.
+
+        Per-recipient outcomes of every batch are bulk inserted into `NotificationDelivery` log,
+        tokens reported as invalid by provider are deactivated in bulk.
+
+        Recipients up to `checkpoint` key (messaging service, application, push token) are skipped;
+        `checkpoint_callback`, if given, is called with key of the last recipient of every sent batch.
+        `keepalive`, if given, is called before every send attempt and while waiting for rate limit,
+        so range stays leased while single batch takes long; exception it raises stops sending.
+        """
+        from djangoFCM.models.notification_delivery import NotificationDelivery
 
-    if not reverse:
-        if action == 'post_add':
-            if not instance.sent and not instance.task:
-                _add_task(instance)
-
-        elif action == 'post_remove':
-            if not instance.recipients.exists():
-                _delete_task(instance)
-
-        elif action == 'post_clear':
-            _delete_task(instance)
-    else:
-        if action == 'post_add':
-            notifications = instance.notifications.filter(
-                sent=False,
-                task__isnull=True,
-            )
-            for notification in notifications:
-                _add_task(notification)
-
-        if action == 'post_remove':
-            # if some m2m were removed (reverse relation)
-            no_push_notifications = Notification.objects.filter(
-                pk=pk_set,  # select notifications relations to which were removed
-                recipients=None,  # if no recipients left
-                sent=False,  # and they are not already sent
-                task__isnull=False,  # and task still exists
+        kwargs = {k: v for k, v in self.arguments.all().values_list('key', 'value')}
+        recipients = self.get_recipients_range(lower, upper)
+        total = recipients.count()
+        processed = 0
+
+        if checkpoint:
+            messaging_service, application_pk, push_token = checkpoint
+            recipients = recipients.filter(
+                models.Q(application__messaging_service__gt=messaging_service)
+                | models.Q(application__messaging_service=messaging_service, application_id__gt=application_pk)
+                | models.Q(application__messaging_service=messaging_service, application_id=application_pk,
+                           push_token__gt=push_token)
             )
+            processed = total - recipients.count()
+
+        # ordered by raw column, as `application` would follow `Meta.ordering` of (swapped) application model
+        rows = recipients.order_by(
+            'application__messaging_service',
+            'application_id',
+            'push_token',
+        ).values_list(
+            'application__messaging_service',
+            'application_id',
+            'push_token',
+        ).iterator(chunk_size=RECIPIENTS_CHUNK_SIZE)
+
+        for (messaging_service, application_pk), group in groupby(rows, key=itemgetter(0, 1)):
+            try:
+                transport = get_backend(messaging_service, self.get_application_credentials(application_pk))
+            except ImproperlyConfigured:
+                # tokens are recorded as failed rather than skipped, so they are not reported as sent
+                logger.exception('Notification %s: backend for messaging service %r is not available',
+                                 self.pk, messaging_service)
+                transport = None
+
+            tokens = (push_token for _, _, push_token in group)
+            batch_size = transport.batch_size if transport else RECIPIENTS_CHUNK_SIZE
+            for batch in iter_batches(tokens, batch_size):
+                if transport:
+                    results = self.send_batch(
+                        transport, messaging_service, application_pk, batch, kwargs, keepalive=keepalive,
+                    )
+                else:
+                    results = [DeliveryResult(push_token, False, error=BACKEND_UNAVAILABLE) for push_token in batch]
+                if LOG_DELIVERIES:
+                    NotificationDelivery.objects.log(self, results)
+                PushToken.objects.invalidate([result.push_token for result in results if result.invalid_token])
+                if checkpoint_callback:
+                    checkpoint_callback((messaging_service, application_pk, batch[-1]))
+
+                processed += len(batch)
+                logger.info('Notification %s: sent %d of %d', self.pk, processed, total)
+                if progress_callback:
+                    progress_callback(processed, total)
+
+    def send_batch(self, transport, messaging_service, application_pk, batch, kwargs, keepalive=None):
+        """
+        Send `batch` of tokens of single application, resending ones failed with transient error.
+
+        Batches are throttled per messaging service and application by `rate_limiter`, which is also
+        held back for as long as provider asks via `Retry-After`. Between resends sender sleeps
+        for random time up to exponentially growing backoff ("full jitter").
+        `keepalive` is called before every attempt and while throttled, see `send_range()`.
+        """
+        results = {}
+        pending = batch
+        for attempt in range(SEND_MAX_RETRIES + 1):
+            rate_limiter.acquire(messaging_service, application_pk, len(pending), keepalive=keepalive)
+            if keepalive:
+                keepalive()
+            batch_results = transport.send(pending, self.title, self.body, kwargs)
+            results.update((result.push_token, result) for result in batch_results)
+
+            retry_after = max((result.retry_after or 0 for result in batch_results), default=0)
+            if retry_after:
+                logger.warning('Notification %s: %r throttled application %s for %.1f s',
+                               self.pk, messaging_service, application_pk, retry_after)
+                rate_limiter.block(messaging_service, application_pk, retry_after)
+
+            pending = [result.push_token for result in batch_results if transport.is_transient(result)]
+            if not pending or attempt == SEND_MAX_RETRIES:
+                break
+
+            backoff = random.uniform(0, min(SEND_RETRY_BACKOFF_MAX, SEND_RETRY_BACKOFF * 2 ** attempt))
+            logger.info('Notification %s: %d tokens failed transiently, retrying in %.1f s',
+                        self.pk, len(pending), backoff)
+            time.sleep(backoff)
+
+        return list(results.values())
+
+    @staticmethod
+    def get_application_credentials(application_pk):
+        """Return `credentials` of application, `None` if swapped application model has no such field."""
+        application_model = PushToken._meta.get_field('application').related_model
+        if not any(field.name == 'credentials' for field in application_model._meta.concrete_fields):
+            return None
+
+        return application_model.objects.filter(pk=application_pk).values_list('credentials', flat=True).first()
+
+    def mark_sent(self):
+        self.send_on = timezone.now()
+        self.sent = True
+        self.save()
+        self.send_ranges.all().delete()
 
-            for notification in no_push_notifications:
-                _delete_task(notification)
 
-        if action == 'pre_clear':
-            # if all m2m are being cleared (reverse relation)
-            no_push_notifications = instance.notifications.annotate(rec_count=models.Count('recipients')).filter(
-                rec_count__lte=1,  # notifications, relations to which to-be-cleared, if that will be last push
-                sent=False,  # and they are not already sent
-                task__isnull=False,  # and task still exists
-            )
+@receiver(post_delete, sender=Notification)
+def notification_deleted_handler(sender, instance, using, **kwargs):
+    invalidate_calendar(instance.send_on)
+    if instance.task:
+        instance.task.delete()
+
 
-            for notification in no_push_notifications:
-                _delete_task(notification)
+@receiver(m2m_changed, sender=Notification.recipients.through)
+def recipients_changed_handler(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Collect notifications whose recipients changed, (un)schedule them in bulk once transaction commits.
+
+    Recipients no longer match compiled ones, so `recipients_compiled_on` of notifications is reset
+    in the same bulk step and they are not reused by `compile_recipients()`.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            defer_reconcile_schedules({instance.pk}, using, recipients_edited=True)
+            instance.recipients_compiled_on = None
+    elif action in ('post_add', 'post_remove'):
+        defer_reconcile_schedules(pk_set, using, recipients_edited=True)
+    elif action == 'pre_clear':
+        # notifications of push token are unknown once relations are cleared
+        notification_pks = set(instance.notifications.values_list('pk', flat=True))
+        defer_reconcile_schedules(notification_pks, using, recipients_edited=True)
+
+
+_pending_reconciliations = threading.local()
+
+
+def defer_reconcile_schedules(notification_pks, using, recipients_edited=False):
+    """
+    Reconcile schedules of notifications after current transaction commits (immediately outside of one).
+
+    Notifications are accumulated per connection and thread until the transaction commits,
+    so any number of recipient edits costs a single bulk reconciliation. With `recipients_edited`
+    their `recipients_compiled_on` is reset as well.
+    """
+    if transaction.get_autocommit(using):
+        # no transaction to wait for; whatever is left pending belongs to rolled back one
+        if hasattr(_pending_reconciliations, using):
+            delattr(_pending_reconciliations, using)
+        pending = PendingReconciliation(using)
+        pending.add(notification_pks, recipients_edited)
+        pending()
+        return
+
+    pending = getattr(_pending_reconciliations, using, None)
+    if pending is None:
+        pending = PendingReconciliation(using)
+        setattr(_pending_reconciliations, using, pending)
+        transaction.on_commit(pending, using=using)
+    pending.add(notification_pks, recipients_edited)
+
+
+class PendingReconciliation:
+    """Notifications to reconcile once transaction commits; the instance itself is the `on_commit` callback."""
+
+    def __init__(self, using):
+        self.using = using
+        self.notification_pks = set()
+        self.edited_pks = set()
+
+    def add(self, notification_pks, recipients_edited=False):
+        self.notification_pks.update(notification_pks)
+        if recipients_edited:
+            self.edited_pks.update(notification_pks)
+
+    def __call__(self):
+        if getattr(_pending_reconciliations, self.using, None) is self:
+            delattr(_pending_reconciliations, self.using)
+        if self.edited_pks:
+            Notification.objects.using(self.using).filter(
+                pk__in=self.edited_pks,
+                recipients_compiled_on__isnull=False,
+            ).update(recipients_compiled_on=None)
+        Notification.objects.db_manager(self.using).reconcile_schedules(self.notification_pks)
 
 
 class NotificationArgument(models.Model):
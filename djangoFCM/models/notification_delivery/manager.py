@@ -0,0 +1,47 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from django.conf import settings
+from django.db import models
+
+DELIVERY_LOG_BATCH_SIZE = getattr(settings, 'DJANGOFCM_DELIVERY_LOG_BATCH_SIZE', 1000)
+
+
+class Manager(models.Manager):
+    def log(self, notification, results):
+        """
+        Bulk insert `DeliveryResult`s of single batch sent for `notification`.
+
+        Uses `bulk_create`, therefore no per-row signals are sent and no `save()` is called.
+        """
+        return self.bulk_create(
+            [
+                self.model(
+                    notification=notification,
+                    push_token_id=result.push_token,
+                    status=self.model.Status.SUCCESS if result.success else self.model.Status.FAILURE,
+                    message_id=result.message_id or '',
+                    error_code=result.error or '',
+                )
+                for result in results
+            ],
+            batch_size=DELIVERY_LOG_BATCH_SIZE,
+        )
@@ -0,0 +1,99 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from djangoFCM.models.notification_delivery.manager import Manager
+from djangoFCM.models.notification import Notification
+from djangoFCM.models.push_token import PushToken
+
+
+class NotificationDelivery(models.Model):
+    """
+    Outcome of sending notification to single recipient.
+
+    Table is append-heavy: rows are written with `bulk_create` per batch, foreign keys are
+    not indexed on their own (composite index covers lookups by notification) and
+    `push_token` has no database constraint, so deleting tokens never touches the log.
+    """
+    class Status(models.TextChoices):
+        SUCCESS = 'S', _('success')
+        FAILURE = 'F', _('failure')
+
+    notification = models.ForeignKey(
+        Notification,
+        models.CASCADE,
+        related_name='deliveries',
+        null=False,
+        db_index=False,
+        verbose_name=_('notification'),
+    )
+    push_token = models.ForeignKey(
+        PushToken,
+        models.DO_NOTHING,
+        related_name='deliveries',
+        null=False,
+        db_index=False,
+        db_constraint=False,
+        verbose_name=_('push token'),
+    )
+    status = models.CharField(
+        max_length=1,
+        blank=False,
+        null=False,
+        choices=Status.choices,
+        verbose_name=_('status'),
+    )
+    message_id = models.CharField(
+        max_length=255,
+        blank=True,
+        null=False,
+        verbose_name=_('provider message id'),
+    )
+    error_code = models.CharField(
+        max_length=63,
+        blank=True,
+        null=False,
+        verbose_name=_('error code'),
+    )
+    timestamp = models.DateTimeField(
+        default=timezone.now,
+        blank=False,
+        null=False,
+        verbose_name=_('timestamp'),
+    )
+
+    objects = Manager()
+
+    class Meta:
+        verbose_name = _('notification delivery')
+        verbose_name_plural = _('notification deliveries')
+        indexes = (
+            models.Index(
+                fields=(
+                    'notification',
+                    'status',
+                ),
+                name='delivery_notification_status',
+            ),
+        )
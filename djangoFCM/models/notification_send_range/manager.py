@@ -0,0 +1,48 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from django.db import models, transaction
+
+
+class Manager(models.Manager):
+    def plan(self, notification, range_size=None):
+        """
+        Return unfinished send ranges of `notification`, splitting its recipients into ranges on first call.
+
+        Ranges are planned once, so sending interrupted by crash or restart resumes where it stopped
+        instead of starting over. `range_size` of `None` plans single range covering all recipients.
+        Planning holds lock of notification row, so concurrent coordinators never plan ranges twice.
+        """
+        with transaction.atomic(using=self.db):
+            type(notification).objects.using(self.db).select_for_update().filter(pk=notification.pk).first()
+
+            if notification.send_ranges.exists():
+                return list(notification.send_ranges.filter(completed=False).order_by('pk'))
+
+            if range_size is None:
+                ranges = [(None, None)]
+            else:
+                ranges = notification.get_recipients_ranges(range_size)
+
+            return self.bulk_create([
+                self.model(notification=notification, lower=lower, upper=upper)
+                for lower, upper in ranges
+            ])
@@ -0,0 +1,186 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from djangoFCM.models.notification_send_range.manager import Manager
+from djangoFCM.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+# seconds range is leased to worker sending it, prolonged by every sent batch and while batch is sent
+SEND_RANGE_LEASE = getattr(settings, 'DJANGOFCM_SEND_RANGE_LEASE', 300)
+# seconds between checks of range leased by another worker
+SEND_RANGE_POLL_INTERVAL = getattr(settings, 'DJANGOFCM_SEND_RANGE_POLL_INTERVAL', 5)
+
+
+class LeaseLost(Exception):
+    """Lease of send range expired and was taken by another worker."""
+
+
+class NotificationSendRange(models.Model):
+    """
+    Range of notification recipients sent as one unit of work, with its progress.
+
+    `checkpoint` holds (messaging service, application, push token) key of the last recipient
+    of the last batch handed to provider; sending of range resumes right after it.
+    Range is sent only by worker holding its lease (`claimed_by` until `claimed_until`).
+    """
+    notification = models.ForeignKey(
+        Notification,
+        models.CASCADE,
+        related_name='send_ranges',
+        null=False,
+        verbose_name=_('notification'),
+    )
+    lower = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        verbose_name=_('lower bound (exclusive)'),
+    )
+    upper = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        verbose_name=_('upper bound (inclusive)'),
+    )
+    checkpoint = models.JSONField(
+        blank=True,
+        null=True,
+        verbose_name=_('checkpoint'),
+    )
+    completed = models.BooleanField(
+        default=False,
+        verbose_name=_('completed'),
+    )
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name=_('claimed by'),
+    )
+    claimed_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name=_('claimed until'),
+    )
+    updated_on = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('updated on'),
+    )
+
+    objects = Manager()
+
+    class Meta:
+        verbose_name = _('notification send range')
+        verbose_name_plural = _('notification send ranges')
+
+    def __str__(self):
+        return f'{self.notification_id}: ({self.lower}, {self.upper}]'
+
+    def get_claimed(self):
+        """Return queryset of this range as long as it is leased by this instance."""
+        return NotificationSendRange.objects.filter(pk=self.pk, claimed_by=self.claimed_by)
+
+    def claim(self):
+        """Take lease of unfinished range unless another worker holds it; return whether it was taken."""
+        now = timezone.now()
+        claimed_by = uuid.uuid4().hex
+        claimed_until = now + timedelta(seconds=SEND_RANGE_LEASE)
+        claimed = NotificationSendRange.objects.filter(
+            models.Q(claimed_until__isnull=True) | models.Q(claimed_until__lt=now),
+            pk=self.pk,
+            completed=False,
+        ).update(claimed_by=claimed_by, claimed_until=claimed_until, updated_on=now)
+        if claimed:
+            self.claimed_by, self.claimed_until = claimed_by, claimed_until
+
+        return bool(claimed)
+
+    def release(self, **fields):
+        self.get_claimed().update(claimed_by='', claimed_until=None, updated_on=timezone.now(), **fields)
+
+    def renew_lease(self, **fields):
+        """
+        Prolong lease of range, storing `fields` along; raise `LeaseLost` if another worker took it.
+
+        Without `fields` lease having more than half of its time left is not written,
+        as nobody can take it over before it expires.
+        """
+        now = timezone.now()
+        if not fields and self.claimed_until - now > timedelta(seconds=SEND_RANGE_LEASE / 2):
+            return
+
+        claimed_until = now + timedelta(seconds=SEND_RANGE_LEASE)
+        if not self.get_claimed().update(claimed_until=claimed_until, updated_on=now, **fields):
+            raise LeaseLost
+        self.claimed_until = claimed_until
+
+    def save_checkpoint(self, checkpoint):
+        messaging_service, application_pk, push_token = checkpoint
+        # application pk is stored as string to keep non-integer (e.g. UUID) keys serializable
+        self.checkpoint = [messaging_service, str(application_pk), push_token]
+        self.renew_lease(checkpoint=self.checkpoint)
+
+    def send(self, progress_callback=None):
+        """
+        Send range starting after `checkpoint`, then mark it completed; completed range is not sent again.
+
+        While another worker holds lease of range, waits for it to complete the range or to let
+        the lease expire, in which case sending is taken over from the last checkpoint.
+        """
+        while True:
+            if self.claim():
+                try:
+                    self.notification.send_range(
+                        self.lower,
+                        self.upper,
+                        progress_callback=progress_callback,
+                        checkpoint=self.checkpoint,
+                        checkpoint_callback=self.save_checkpoint,
+                        keepalive=self.renew_lease,
+                    )
+                except LeaseLost:
+                    logger.warning('Send range %s was taken over by another worker', self.pk)
+                except BaseException:
+                    self.release()
+                    raise
+                else:
+                    self.release(completed=True)
+                    self.completed = True
+                    return
+
+            try:
+                self.refresh_from_db(fields=('checkpoint', 'completed'))
+            except NotificationSendRange.DoesNotExist:
+                # notification was marked sent meanwhile
+                return
+            if self.completed:
+                return
+            time.sleep(SEND_RANGE_POLL_INTERVAL)
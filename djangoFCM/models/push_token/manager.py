@@ -19,8 +19,139 @@
 #  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
 # ******************************************************************************
 
-from django.db import models
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from djangoFCM.src.batching import iter_batches
+from djangoFCM.src.heartbeat import heartbeats
+
+# delete invalid tokens instead of deactivating them
+DELETE_INVALID_TOKENS = getattr(settings, 'DJANGOFCM_DELETE_INVALID_TOKENS', False)
+# tokens upserted by one statement
+REGISTRATION_BATCH_SIZE = getattr(settings, 'DJANGOFCM_REGISTRATION_BATCH_SIZE', 1000)
+# days after last refresh token is considered expired
+PUSH_TOKEN_TTL_DAYS = getattr(settings, 'DJANGOFCM_PUSH_TOKEN_TTL_DAYS', 270)
+# delete expired tokens instead of deactivating them
+DELETE_EXPIRED_TOKENS = getattr(settings, 'DJANGOFCM_DELETE_EXPIRED_TOKENS', False)
+# tokens expired by one statement
+EXPIRATION_CHUNK_SIZE = getattr(settings, 'DJANGOFCM_EXPIRATION_CHUNK_SIZE', 1000)
 
 
 class Manager(models.Manager):
-    pass
+    def active(self):
+        return self.filter(is_active=True)
+
+    def invalidate(self, push_tokens):
+        """
+        Deactivate (or delete, if `DJANGOFCM_DELETE_INVALID_TOKENS` is set) `push_tokens` in bulk.
+
+        Return number of affected tokens.
+        """
+        if not push_tokens:
+            return 0
+
+        queryset = self.filter(pk__in=push_tokens)
+        if DELETE_INVALID_TOKENS:
+            return queryset.delete()[0]
+
+        return queryset.filter(is_active=True).update(is_active=False, invalidated_at=timezone.now())
+
+    def register(self, registrations):
+        """
+        Create or update tokens from (`push_token`, `user_id`, `application_id`) triples in bulk.
+
+        Every batch costs one query reading current state of its tokens and one
+        `INSERT ... ON CONFLICT DO UPDATE` of new and changed ones (re-registered inactive
+        tokens are activated again). Tokens registered unchanged are only recorded in
+        `heartbeats`, which coalesces their `update_date` refreshes into periodic bulk updates.
+        Return number of created or updated tokens.
+        """
+        user_field = self.model._meta.get_field('user').target_field
+        application_field = self.model._meta.get_field('application').target_field
+        unique_fields = None
+        if connections[self.db].features.supports_update_conflicts_with_target:
+            unique_fields = ('push_token',)
+
+        changed = 0
+        for batch in iter_batches(registrations, REGISTRATION_BATCH_SIZE):
+            # last registration of token wins, single statement may not touch row twice
+            wanted = {
+                push_token: (user_field.to_python(user_id), application_field.to_python(application_id))
+                for push_token, user_id, application_id in batch
+            }
+            current = self.filter(pk__in=wanted).values_list('push_token', 'user_id', 'application_id', 'is_active')
+            unchanged = [
+                push_token
+                for push_token, user_id, application_id, is_active in current
+                if is_active and wanted[push_token] == (user_id, application_id)
+            ]
+            for push_token in unchanged:
+                del wanted[push_token]
+            heartbeats.record(unchanged)
+
+            if not wanted:
+                continue
+
+            self.bulk_create(
+                [
+                    self.model(
+                        push_token=push_token,
+                        user_id=user_id,
+                        application_id=application_id,
+                        is_active=True,
+                        invalidated_at=None,
+                    )
+                    for push_token, (user_id, application_id) in wanted.items()
+                ],
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=('user', 'application', 'is_active', 'invalidated_at', 'update_date'),
+            )
+            heartbeats.mark_fresh(wanted)
+            changed += len(wanted)
+
+        return changed
+
+    def refresh(self, push_tokens):
+        """Record that `push_tokens` are still in use; `update_date` is updated with coalescing delay."""
+        heartbeats.record(push_tokens)
+
+    def expire(self, ttl_days=None, delete=None, chunk_size=None, pause=0.0):
+        """
+        Deactivate (or delete) tokens not refreshed for `ttl_days`, return number of affected tokens.
+
+        Tokens are processed in keyset-paginated chunks of `chunk_size`, each in own short transaction,
+        so neither token rows nor `Notification.recipients` rows cascaded from them are locked for long.
+        `pause` seconds are slept between chunks to leave room for other writers.
+        """
+        ttl_days = PUSH_TOKEN_TTL_DAYS if ttl_days is None else ttl_days
+        delete = DELETE_EXPIRED_TOKENS if delete is None else delete
+        chunk_size = chunk_size or EXPIRATION_CHUNK_SIZE
+
+        now = timezone.now()
+        expired = self.filter(update_date__lt=now - timedelta(days=ttl_days))
+        if not delete:
+            expired = expired.filter(is_active=True)
+
+        affected = 0
+        lower = None
+        while True:
+            chunk = expired if lower is None else expired.filter(pk__gt=lower)
+            push_tokens = list(chunk.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not push_tokens:
+                return affected
+
+            with transaction.atomic(using=self.db):
+                # refreshed since chunk was read tokens are filtered out again by `expired`
+                if delete:
+                    affected += expired.filter(pk__in=push_tokens).delete()[1].get(self.model._meta.label, 0)
+                else:
+                    affected += expired.filter(pk__in=push_tokens).update(is_active=False, invalidated_at=now)
+
+            lower = push_tokens[-1]
+            if pause:
+                time.sleep(pause)
@@ -60,12 +60,32 @@ class PushToken(models.Model):
         null=False,
         verbose_name=_('update date'),
     )
+    is_active = models.BooleanField(
+        null=False,
+        blank=False,
+        default=True,
+        verbose_name=_('is active'),
+    )
+    invalidated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('invalidation date'),
+    )
 
     objects = Manager()
 
     class Meta:
         verbose_name = _('push token')
         verbose_name_plural = _('push tokens')
+        indexes = (
+            models.Index(
+                fields=(
+                    'update_date',
+                ),
+                name='push_token_update_date',
+            ),
+        )
 
     @property
     def short_token(self):
@@ -19,5 +19,6 @@
 #  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
 # ******************************************************************************
 
-from .fcm import fcm_app
-from .hms import hms_app
+# provider clients are constructed lazily, see `djangoFCM.src.registry`
+from .fcm import fcm_app, FCM_BATCH_SIZE
+from .hms import hms_app, HMS_BATCH_SIZE
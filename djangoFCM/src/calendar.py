@@ -1,48 +1,175 @@
-import pytz
+import hashlib
+import uuid
 from calendar import Calendar, month_name, day_name
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncHour
 from django.utils import timezone
+from django.utils.formats import date_format
+
+# seconds aggregated calendar is cached for; it is invalidated earlier when notifications change
+CALENDAR_CACHE_TIMEOUT = getattr(settings, 'DJANGOFCM_CALENDAR_CACHE_TIMEOUT', 300)
+
+
+def get_version_key(value):
+    """Return cache key of version of calendar month `value` falls into (in UTC)."""
+    if timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc)
+    return f'djangoFCM:calendar:version:{value.year}-{value.month}'
+
+
+def get_version_keys(start, end):
+    """Return version keys of months covering [`start`, `end`)."""
+    keys = [get_version_key(start)]
+    day = start
+    while day < end:
+        day += timedelta(days=1)
+        key = get_version_key(min(day, end - timedelta(microseconds=1)))
+        if key != keys[-1]:
+            keys.append(key)
+
+    return keys
+
+
+def invalidate_calendar(*values):
+    """Invalidate cached aggregated calendars covering any of `values` datetimes."""
+    keys = {get_version_key(value) for value in values if value is not None}
+    if keys:
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
 
 
 class DjangoCalendar(Calendar):
+    """
+    Calendar of `queryset` objects placed by their `date_lookup_name` date.
+
+    Events of the whole displayed period are fetched by single query of `event_fields` only
+    and bucketed by date in `tzinfo` (current timezone by default).
+    """
     year = None
     month = None
     queryset = None
     date_lookup_name = None
+    event_fields = ('name', 'title', 'body', 'sent')
+    # boolean field splitting events into sent and pending ones, many-to-many counted as volume
+    status_field = 'sent'
+    volume_lookup = 'recipients'
 
     def get_event_kwargs(self, event):
         return {}
 
-    def __init__(self, year, month, queryset, date_lookup_name) -> None:
+    def __init__(self, year, month, queryset, date_lookup_name, tzinfo=None) -> None:
         super().__init__()
 
         self.year = year
         self.month = month
         self.queryset = queryset
         self.date_lookup_name = date_lookup_name
+        self.tzinfo = tzinfo or timezone.get_current_timezone()
+
+    def to_datetime(self, day):
+        """Return start of local `day` comparable with `date_lookup_name` values."""
+        value = datetime.combine(day, time.min)
+        if settings.USE_TZ:
+            value = timezone.make_aware(value, self.tzinfo)
+
+        return value
+
+    def get_event_context(self, event, local_time):
+        return {
+            'time': local_time.strftime('%H:%M'),
+            'title': event.title or event.name,
+            'body': event.body,
+            'is_sent': event.sent,
+            'kwargs': self.get_event_kwargs(event),
+        }
+
+    def get_events_by_date(self, start, end):
+        """Return events of [`start`, `end`) dates, mapping local date to list of event contexts."""
+        events = defaultdict(list)
+        queryset = self.queryset.filter(**{
+            f'{self.date_lookup_name}__gte': self.to_datetime(start),
+            f'{self.date_lookup_name}__lt': self.to_datetime(end),
+        }).only(*self.event_fields, self.date_lookup_name).order_by(self.date_lookup_name)
+
+        for event in queryset:
+            value = getattr(event, self.date_lookup_name)
+            if timezone.is_aware(value):
+                value = timezone.localtime(value, self.tzinfo)
+            events[value.date()].append(self.get_event_context(event, value))
+
+        return events
+
+    def aggregate_by_hour(self, start, end):
+        """
+        Return counts of sent and pending events and their volume for [`start`, `end`) dates.
+
+        Counts are aggregated by single `GROUP BY` local hour query and returned as mapping
+        of local date to day totals, which hold per-hour totals in `hours`.
+        """
+        hour = TruncHour(self.date_lookup_name, tzinfo=self.tzinfo if settings.USE_TZ else None)
+        rows = self.queryset.filter(**{
+            f'{self.date_lookup_name}__gte': self.to_datetime(start),
+            f'{self.date_lookup_name}__lt': self.to_datetime(end),
+        }).annotate(hour=hour).order_by().values('hour', self.status_field).annotate(
+            count=Count('pk', distinct=True),
+            volume=Count(self.volume_lookup),
+        )
+
+        days = {}
+        for row in rows:
+            day = days.setdefault(row['hour'].date(), {
+                'sent': 0,
+                'pending': 0,
+                'volume': 0,
+                'hours': [{'sent': 0, 'pending': 0, 'volume': 0} for _ in range(24)],
+            })
+            status = 'sent' if row[self.status_field] else 'pending'
+            for totals in (day, day['hours'][row['hour'].hour]):
+                totals[status] += row['count']
+                totals['volume'] += row['volume']
+
+        return days
+
+    def get_aggregates(self, start, end):
+        """Cached `aggregate_by_hour()`, invalidated by `invalidate_calendar()` of any datetime in period."""
+        query_hash = hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+        cache_key = f'djangoFCM:calendar:{query_hash}:{self.tzinfo}:{start}:{end}'
+        # versions are read before aggregating, so changes made meanwhile invalidate result
+        versions = cache.get_many(get_version_keys(self.to_datetime(start), self.to_datetime(end)))
+
+        cached = cache.get(cache_key)
+        if cached is not None and cached['versions'] == versions:
+            return cached['days']
+
+        days = self.aggregate_by_hour(start, end)
+        cache.set(cache_key, {'versions': versions, 'days': days}, CALENDAR_CACHE_TIMEOUT)
+        return days
 
     def monthdays2calendar_with_events(self, _year, _month):
-        weeks = self.monthdays2calendar(_year, _month)
-
-        _month_events = []
-
-        for week in weeks:
-            _week_events = []
-            for day in week:
-                _daily_events = [
-                    {
-                        'time': timezone.localtime(event.send_on, pytz.timezone('Europe/Moscow')).strftime('%H:%M'),
-                        'title': event.title or event.name,
-                        'body': event.body,
-                        'is_sent': event.sent,
-                        'kwargs': self.get_event_kwargs(event),
-                    }
-                    for event in self.queryset.filter(**{f'{self.date_lookup_name}__day': day[0]})
-                ]
-                _week_events.append((day[0] or None, _daily_events))
-            _month_events.append(_week_events)
-
-        return _month_events
+        first = date(_year, _month, 1)
+        events = self.get_events_by_date(first, (first + timedelta(days=31)).replace(day=1))
+
+        return [
+            [
+                (day or None, events.get(date(_year, _month, day), []) if day else [])
+                for day, _ in week
+            ]
+            for week in self.monthdays2calendar(_year, _month)
+        ]
+
+    def week_with_events(self, day):
+        """Return (date, events) pairs of week containing `day`, starting from `firstweekday`."""
+        start = day - timedelta(days=(day.weekday() - self.firstweekday) % 7)
+        events = self.get_events_by_date(start, start + timedelta(days=7))
+
+        return [
+            (start + timedelta(days=offset), events.get(start + timedelta(days=offset), []))
+            for offset in range(7)
+        ]
 
     def to_context(self):
         ctx = {
@@ -52,3 +179,34 @@ class DjangoCalendar(Calendar):
         }
 
         return ctx
+
+    def to_heatmap_context(self):
+        first = date(self.year, self.month, 1)
+        days = self.get_aggregates(first, (first + timedelta(days=31)).replace(day=1))
+        busiest = max((totals['sent'] + totals['pending'] for totals in days.values()), default=0)
+
+        def get_cell(day):
+            if not day:
+                return None
+            cell_date = date(self.year, self.month, day)
+            totals = days.get(cell_date)
+            # 0..4 intensity relative to the busiest day of month
+            level = -(-4 * (totals['sent'] + totals['pending']) // busiest) if totals else 0
+            return {'day': day, 'date': cell_date, 'totals': totals, 'level': level}
+
+        ctx = {
+            'month_name': f'{month_name[self.month]} {self.year}',
+            'weekdays': [day_name[weekday] for weekday in self.iterweekdays()],
+            'weeks': [[get_cell(day) for day, _ in week] for week in self.monthdays2calendar(self.year, self.month)],
+        }
+
+        return ctx
+
+    def to_week_context(self, day):
+        days = self.week_with_events(day)
+        ctx = {
+            'week_name': f'{date_format(days[0][0])} — {date_format(days[-1][0])}',
+            'days': [(day_name[day.weekday()], day, events) for day, events in days],
+        }
+
+        return ctx
@@ -0,0 +1,177 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import hashlib
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+
+# composer operator -> field lookup
+OPERATORS = {
+    'is': 'exact',
+    'in': 'in',
+    'gt': 'gt',
+    'lt': 'lt',
+    'contains': 'icontains',
+    'isnull': 'isnull',
+}
+
+TRUE_VALUES = ('', '1', 'true', 'yes', 'on')
+
+# fields holding secrets, never offered by composer nor accepted in conditions
+EXCLUDED_FIELDS = frozenset(getattr(settings, 'DJANGOFCM_COMPOSER_EXCLUDED_FIELDS', ('credentials', 'password')))
+
+
+def compile_condition(condition):
+    """Turn single composer condition into `Q`."""
+    operator = condition.get('operator') or 'is'
+    try:
+        lookup = OPERATORS[operator]
+    except KeyError:
+        raise ValueError(f'Unknown operator: {operator}')
+
+    value = condition.get('value')
+    if operator == 'in':
+        value = [item.strip() for item in str(value or '').split(',') if item.strip()]
+    elif operator == 'isnull':
+        value = str(value if value is not None else '').strip().lower() in TRUE_VALUES
+
+    return Q(**{f'{condition["attribute"]}__{lookup}': value})
+
+
+def compile_conditions(conditions):
+    """
+    Turn list of composer conditions into single `Q`.
+
+    Every condition is joined to the previous one by its `group_state` (`AND` or `OR`),
+    `AND` binds tighter than `OR`. Condition having `conditions` key instead of
+    `attribute` is a nested group compiled recursively.
+    """
+    groups = []
+
+    for condition in conditions:
+        if 'conditions' in condition:
+            q = compile_conditions(condition['conditions'])
+        else:
+            q = compile_condition(condition)
+
+        if not groups or condition.get('group_state') == 'OR':
+            groups.append(q)
+        else:
+            groups[-1] &= q
+
+    return reduce(or_, groups, Q())
+
+
+def iter_attributes(conditions):
+    """Yield attributes of all conditions, including ones of nested groups."""
+    for condition in conditions or ():
+        if not condition:
+            continue
+        if 'conditions' in condition:
+            yield from iter_attributes(condition['conditions'])
+        else:
+            yield condition['attribute']
+
+
+def iter_lookup_fields(model, attribute):
+    """Yield fields `attribute` lookup of `model` passes through, stopping at first non-field part (e.g. transform)."""
+    for name in attribute.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return
+        yield field
+        if not field.is_relation:
+            return
+        model = field.related_model
+
+
+def is_multivalued(model, attribute):
+    """Check if `attribute` lookup of `model` spans to-many relation (reverse foreign key or many-to-many)."""
+    return any(field.one_to_many or field.many_to_many for field in iter_lookup_fields(model, attribute))
+
+
+def is_excluded(model, attribute):
+    """Check if `attribute` lookup of `model` passes through any of `EXCLUDED_FIELDS`."""
+    return any(field.name in EXCLUDED_FIELDS for field in iter_lookup_fields(model, attribute))
+
+
+def filter_by_conditions(queryset, conditions):
+    """
+    Filter `queryset` by composer conditions.
+
+    Conditions spanning to-many relations are applied as `pk IN (SELECT ...)` semi-join,
+    so objects are neither duplicated by joined rows nor need `DISTINCT`.
+    Conditions on `EXCLUDED_FIELDS` raise `ValueError`, as matching them would reveal secrets.
+    """
+    model = queryset.model
+    for attribute in iter_attributes(conditions):
+        if is_excluded(model, attribute):
+            raise ValueError(f'Attribute is not allowed: {attribute}')
+
+    q = compile_conditions(conditions)
+    if any(is_multivalued(model, attribute) for attribute in iter_attributes(conditions)):
+        return queryset.filter(pk__in=model._base_manager.filter(q).values('pk'))
+
+    return queryset.filter(q)
+
+
+def normalize_conditions(conditions):
+    """
+    Return composer conditions in canonical form.
+
+    Empty conditions are dropped, missing operator defaults to `is`, values are strings
+    and `group_state` of the first condition in group (which joins nothing) is omitted.
+    """
+    result = []
+
+    for condition in conditions or ():
+        if not condition:
+            continue
+
+        if 'conditions' in condition:
+            normalized = {'conditions': normalize_conditions(condition['conditions'])}
+        else:
+            value = condition.get('value')
+            normalized = {
+                'attribute': condition['attribute'],
+                'operator': condition.get('operator') or 'is',
+                'value': '' if value is None else str(value),
+            }
+        if result:
+            normalized['group_state'] = condition.get('group_state') or 'AND'
+
+        result.append(normalized)
+
+    return result
+
+
+def hash_conditions(conditions):
+    """Return stable hash of composer conditions, equal for identical audience definitions."""
+    return hashlib.sha256(
+        json.dumps(normalize_conditions(conditions), sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
@@ -0,0 +1,81 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, NamedTuple, Optional
+
+# statuses provider answers with when it is overloaded or sender is over quota
+THROTTLING_STATUSES = frozenset((429, 503))
+# seconds to wait when throttling response has no `Retry-After`
+DEFAULT_RETRY_AFTER = 1.0
+# errors of transports reporting network failures by exception name, worth retrying
+NETWORK_ERRORS = frozenset((
+    'ConnectError',
+    'ConnectTimeout',
+    'ReadError',
+    'ReadTimeout',
+    'WriteError',
+    'WriteTimeout',
+    'PoolTimeout',
+    'RemoteProtocolError',
+))
+# error of tokens which could not be sent because backend of their messaging service is missing or misconfigured
+BACKEND_UNAVAILABLE = 'BackendUnavailable'
+
+
+class DeliveryResult(NamedTuple):
+    """Outcome of sending a message to a single push token."""
+    push_token: str
+    success: bool
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    invalid_token: bool = False
+    # seconds provider asked to wait before sending again
+    retry_after: Optional[float] = None
+
+
+def get_retry_after(status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Return seconds to wait according to throttling response, `None` if response is not throttling.
+
+    `Retry-After` may hold either number of seconds or HTTP date.
+    """
+    if status_code not in THROTTLING_STATUSES:
+        return None
+
+    value = headers.get('Retry-After')
+    if not value:
+        return DEFAULT_RETRY_AFTER
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
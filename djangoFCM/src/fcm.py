@@ -19,7 +19,63 @@
 #  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
 # ******************************************************************************
 
+import logging
+
 from django.conf import settings
-from pyfcm import FCMNotification
 
-fcm_app = FCMNotification(api_key=settings.DJANGOFCM_FCM_API_KEY)
+from djangoFCM.src.delivery import DeliveryResult
+from djangoFCM.src.registry import registry
+
+logger = logging.getLogger(__name__)
+
+
+def create_fcm_app(api_key=None):
+    from pyfcm import FCMNotification
+
+    return FCMNotification(api_key=api_key or settings.DJANGOFCM_FCM_API_KEY)
+
+
+registry.register('fcm_app', create_fcm_app)
+fcm_app = registry.lazy('fcm_app')
+
+# FCM multicast accepts up to 500 registration tokens per request
+FCM_BATCH_SIZE = getattr(settings, 'DJANGOFCM_FCM_BATCH_SIZE', 500)
+
+# errors meaning that token will never be valid again
+FCM_INVALID_TOKEN_ERRORS = frozenset((
+    'NotRegistered',
+    'InvalidRegistration',
+))
+# error of tokens FCM response has no result for, e.g. partial or failed multicast response
+FCM_MISSING_RESULT = 'MissingResult'
+# errors caused by FCM being overloaded or failing internally
+FCM_TRANSIENT_ERRORS = frozenset((
+    'Unavailable',
+    'InternalServerError',
+    'DeviceMessageRateExceeded',
+    FCM_MISSING_RESULT,
+))
+
+
+def parse_fcm_response(tokens, response):
+    """
+    Map `pyfcm` multicast response onto per-token `DeliveryResult`s.
+
+    Tokens response has no result for are reported as failed with transient `FCM_MISSING_RESULT`,
+    so they are retried, logged and checkpointed like any other failure.
+    """
+    results = (response or {}).get('results') or []
+    if len(results) < len(tokens):
+        logger.warning('FCM response has %d results for %d tokens', len(results), len(tokens))
+        results = [*results, *({'error': FCM_MISSING_RESULT} for _ in range(len(tokens) - len(results)))]
+
+    return [
+        DeliveryResult(
+            push_token=token,
+            success='message_id' in result,
+            message_id=result.get('message_id'),
+            error=result.get('error'),
+            invalid_token=result.get('error') in FCM_INVALID_TOKEN_ERRORS,
+        )
+        for token, result in zip(tokens, results)
+    ]
@@ -0,0 +1,146 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import atexit
+import logging
+import os
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils import timezone
+
+from djangoFCM.src.batching import iter_batches
+
+logger = logging.getLogger(__name__)
+
+# seconds `PushToken.update_date` may lag behind token's last refresh
+HEARTBEAT_TOLERANCE = getattr(settings, 'DJANGOFCM_HEARTBEAT_TOLERANCE', 3600)
+# cache remembering recently refreshed tokens across processes
+HEARTBEAT_CACHE = getattr(settings, 'DJANGOFCM_HEARTBEAT_CACHE', 'default')
+# buffered refreshes are written once there are that many of them...
+HEARTBEAT_BUFFER_SIZE = getattr(settings, 'DJANGOFCM_HEARTBEAT_BUFFER_SIZE', 1000)
+# ...or that many seconds after the first of them was buffered
+HEARTBEAT_FLUSH_INTERVAL = getattr(settings, 'DJANGOFCM_HEARTBEAT_FLUSH_INTERVAL', 60)
+
+
+class HeartbeatBuffer:
+    """
+    Coalesce refreshes of push tokens into bulk updates of `PushToken.update_date`.
+
+    Token written within `tolerance` seconds (by any process sharing the cache) is not
+    written again. Others are buffered in process and written by single `UPDATE` per
+    `max_size` tokens, when buffer fills up, by background timer `flush_interval` seconds
+    after first refresh is buffered, and on exit. With `tolerance` of `0` every refresh
+    is written immediately.
+    """
+
+    def __init__(self, tolerance, max_size, flush_interval, cache_alias):
+        self.tolerance = tolerance
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.cache_alias = cache_alias
+        self._reset()
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_cache_key(push_token):
+        return f'djangoFCM:heartbeat:{push_token}'
+
+    def mark_fresh(self, push_tokens):
+        """Remember `push_tokens` as just written, so their refreshes within tolerance are skipped."""
+        if self.tolerance:
+            caches[self.cache_alias].set_many(
+                {self.get_cache_key(push_token): 1 for push_token in push_tokens},
+                timeout=self.tolerance,
+            )
+
+    def record(self, push_tokens):
+        """Record refresh of `push_tokens`."""
+        push_tokens = set(push_tokens)
+        if not push_tokens:
+            return
+
+        if not self.tolerance:
+            self.write(push_tokens)
+            return
+
+        keys = {self.get_cache_key(push_token): push_token for push_token in push_tokens}
+        fresh = caches[self.cache_alias].get_many(keys)
+        stale = {push_token for key, push_token in keys.items() if key not in fresh}
+        if not stale:
+            return
+
+        with self._lock:
+            self._pending |= stale
+            due = len(self._pending) >= self.max_size
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if due:
+            self.flush()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # timer thread is gone after flush, so are its connections
+            connections.close_all()
+
+    def flush(self):
+        """Write buffered refreshes, then remember them as fresh."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+
+        if not pending:
+            return
+
+        try:
+            self.write(pending)
+        except Exception:  # noqa
+            # losing refreshes only makes `update_date` staler, never fail caller for it
+            logger.exception('Failed to write %d push token refreshes', len(pending))
+        else:
+            self.mark_fresh(pending)
+
+    def write(self, push_tokens):
+        push_token_model = apps.get_model('djangoFCM', 'PushToken')
+        now = timezone.now()
+        # sorted, so concurrent writers lock rows in same order
+        for batch in iter_batches(sorted(push_tokens), self.max_size):
+            push_token_model.objects.filter(pk__in=batch).update(update_date=now)
+
+
+heartbeats = HeartbeatBuffer(HEARTBEAT_TOLERANCE, HEARTBEAT_BUFFER_SIZE, HEARTBEAT_FLUSH_INTERVAL, HEARTBEAT_CACHE)
+atexit.register(heartbeats.flush)
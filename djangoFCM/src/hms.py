@@ -1,8 +1,77 @@
+import json
+
 from django.conf import settings
-from pyhcm import HCMNotification
 
-hms_app = HCMNotification(
-    client_id=settings.DJANGOFCM_HMS_CLIENT_ID,
-    client_secret=settings.DJANGOFCM_HMS_SECRET,
-    project_id=settings.DJANGOFCM_HMS_PROJECT_ID,
-)
+from djangoFCM.src.delivery import DeliveryResult
+from djangoFCM.src.registry import registry
+
+
+def create_hms_app(client_id=None, client_secret=None, project_id=None):
+    from pyhcm import HCMNotification
+
+    return HCMNotification(
+        client_id=client_id or settings.DJANGOFCM_HMS_CLIENT_ID,
+        client_secret=client_secret or settings.DJANGOFCM_HMS_SECRET,
+        project_id=project_id or settings.DJANGOFCM_HMS_PROJECT_ID,
+    )
+
+
+registry.register('hms_app', create_hms_app)
+hms_app = registry.lazy('hms_app')
+
+# HMS accepts up to 1000 tokens per message
+HMS_BATCH_SIZE = getattr(settings, 'DJANGOFCM_HMS_BATCH_SIZE', 1000)
+
+HMS_SUCCESS = '80000000'
+HMS_PARTIAL_SUCCESS = '80100000'
+# all tokens in request are invalid
+HMS_INVALID_TOKENS = '80300007'
+# internal HMS error or HTTP status of failed request
+HMS_TRANSIENT_ERRORS = frozenset((
+    '81000001',
+    '500',
+    '502',
+    '503',
+    '504',
+))
+
+
+def parse_hms_response(tokens, response):
+    """
+    Map HMS push response onto per-token `DeliveryResult`s.
+
+    HMS answers with a single code per message; on partial success `msg` holds
+    a JSON object listing `illegal_tokens`.
+    """
+    if isinstance(response, bool):
+        return [DeliveryResult(token, response, error=None if response else 'UNKNOWN') for token in tokens]
+
+    response = response or {}
+    code = response.get('code')
+    request_id = response.get('requestId')
+
+    if code == HMS_SUCCESS:
+        return [DeliveryResult(token, True, message_id=request_id) for token in tokens]
+
+    if code == HMS_PARTIAL_SUCCESS:
+        try:
+            illegal_tokens = set(json.loads(response.get('msg') or '{}').get('illegal_tokens') or ())
+        except (ValueError, AttributeError):
+            illegal_tokens = set()
+        return [
+            DeliveryResult(token, False, message_id=request_id, error=code, invalid_token=True)
+            if token in illegal_tokens else
+            DeliveryResult(token, True, message_id=request_id)
+            for token in tokens
+        ]
+
+    return [
+        DeliveryResult(
+            token,
+            False,
+            message_id=request_id,
+            error=code or 'UNKNOWN',
+            invalid_token=code == HMS_INVALID_TOKENS,
+        )
+        for token in tokens
+    ]
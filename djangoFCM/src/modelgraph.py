@@ -0,0 +1,58 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import threading
+
+from django.apps import apps
+
+
+class ModelGraphMemo:
+    """
+    Memoize values derived from installed models until app registry changes.
+
+    `apps.get_models()` result is cached by registry until its cache is cleared,
+    so its identity tells whether memoized values are still valid.
+    """
+
+    def __init__(self):
+        self._state = (None, {})
+        self._lock = threading.RLock()
+
+    def get(self, key, compute):
+        """Return value memoized under `key`, calling `compute()` on miss or after registry changed."""
+        all_models = apps.get_models()
+        source, values = self._state
+        if source is all_models:
+            try:
+                return values[key]
+            except KeyError:
+                pass
+
+        # reentrant, `compute` may read other values of the same memo
+        with self._lock:
+            source, values = self._state
+            if source is not all_models:
+                values = {}
+                self._state = (all_models, values)
+            if key not in values:
+                values[key] = compute()
+
+            return values[key]
@@ -0,0 +1,225 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# cache holding buckets shared by all workers, `None` keeps buckets in process memory
+RATE_LIMIT_CACHE = getattr(settings, 'DJANGOFCM_RATE_LIMIT_CACHE', 'default')
+# seconds bucket state lock is held at most
+RATE_LIMIT_LOCK_TIMEOUT = 5
+# seconds between `keepalive` calls while waiting for rate limit
+RATE_LIMIT_KEEPALIVE_INTERVAL = 30
+
+
+class TokenBucket:
+    """
+    Token bucket refilled with `rate` tokens per second up to `capacity`, kept in process memory.
+
+    Tokens are reserved rather than waited for: `reserve()` always takes tokens, possibly
+    going into debt, and returns seconds caller has to wait before using them. Thus concurrent
+    callers queue up fairly instead of polling. `rate` of `None` means no limit, bucket then
+    only delays callers after `block()`.
+    """
+
+    def __init__(self, key, rate=None, capacity=None):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._state = None
+        self._lock = threading.Lock()
+
+    def get_state(self):
+        return self._state
+
+    def set_state(self, state):
+        self._state = state
+
+    def lock(self):
+        return self._lock
+
+    def update(self, reserve=0, block=0.0):
+        """Refill bucket, take `reserve` tokens, block it for `block` seconds; return seconds to wait."""
+        with self.lock():
+            now = time.time()
+            state = self.get_state() or {'tokens': self.capacity or 0, 'timestamp': now}
+            tokens, timestamp = state['tokens'], state['timestamp']
+
+            if now > timestamp:
+                if self.rate:
+                    tokens = min(self.capacity, tokens + (now - timestamp) * self.rate)
+                timestamp = now
+
+            if block and now + block > timestamp:
+                # provider asked to back off: nothing is refilled until then
+                tokens, timestamp = min(tokens, 0), now + block
+
+            if self.rate:
+                tokens -= reserve
+
+            self.set_state({'tokens': tokens, 'timestamp': timestamp})
+
+        debt = -tokens / self.rate if self.rate and tokens < 0 else 0.0
+        return max(timestamp - now, 0.0) + debt
+
+    def reserve(self, amount=1):
+        """Take `amount` tokens, return seconds to wait before using them."""
+        return self.update(reserve=amount)
+
+    def block(self, seconds):
+        """Make every caller wait at least `seconds` from now, e.g. to honor `Retry-After`."""
+        self.update(block=seconds)
+
+    def get_blocked_for(self):
+        """Return seconds left of `block()`, reading state without lock; enough for bucket of unlimited rate."""
+        state = self.get_state()
+        return max(state['timestamp'] - time.time(), 0.0) if state else 0.0
+
+
+class CacheTokenBucket(TokenBucket):
+    """Token bucket kept in Django cache, shared by every process using that cache."""
+
+    def __init__(self, key, rate=None, capacity=None, cache_alias=None):
+        super().__init__(key, rate, capacity)
+        self.cache_alias = cache_alias or RATE_LIMIT_CACHE
+        self.cache_key = f'djangoFCM:ratelimit:{key}'
+
+    @property
+    def cache(self):
+        # cache connections are per thread, while buckets are shared by threads
+        return caches[self.cache_alias]
+
+    def get_state(self):
+        return self.cache.get(self.cache_key)
+
+    def set_state(self, state):
+        # idle bucket is full anyway, no need to keep it forever
+        self.cache.set(self.cache_key, state, timeout=max(3600, int(state['timestamp'] - time.time()) + 60))
+
+    def lock(self):
+        return CacheLock(self.cache, f'{self.cache_key}:lock')
+
+
+class CacheLock:
+    """Short-living lock on `cache.add()`; assumed to be given up by crashed holder after `timeout`."""
+
+    def __init__(self, cache, key, timeout=RATE_LIMIT_LOCK_TIMEOUT):
+        self.cache = cache
+        self.key = key
+        self.timeout = timeout
+        self.value = None
+
+    def acquire(self, blocking=True):
+        """Take lock, waiting for it at most `timeout` seconds if `blocking`; return whether it was taken."""
+        self.value = uuid.uuid4().hex
+        deadline = time.monotonic() + self.timeout
+        while not self.cache.add(self.key, self.value, timeout=self.timeout):
+            if not blocking:
+                return False
+            if time.monotonic() > deadline:
+                logger.warning('Lock %s was not acquired in %s s', self.key, self.timeout)
+                return False
+            time.sleep(0.005)
+
+        return True
+
+    def release(self):
+        """Give lock up, unless it expired and was taken by somebody else meanwhile."""
+        if self.cache.get(self.key) == self.value:
+            self.cache.delete(self.key)
+
+    def __enter__(self):
+        # proceeding without lock after `timeout` is preferred to stalling sends for good
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class RateLimiter:
+    """
+    Throttle sends per messaging service and per application.
+
+    `limits` maps messaging service to dict with optional `RATE` and `APPLICATION_RATE`
+    (messages per second) and `BURST`, `APPLICATION_BURST` (bucket capacities, default to rate).
+    """
+
+    def __init__(self, limits, bucket_class=None):
+        self.limits = limits
+        if bucket_class is None:
+            bucket_class = CacheTokenBucket if RATE_LIMIT_CACHE else TokenBucket
+        self.bucket_class = bucket_class
+        self._buckets = {}
+
+    def get_bucket(self, key, rate, capacity):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets.setdefault(key, self.bucket_class(key, rate, capacity))
+
+        return bucket
+
+    def get_buckets(self, messaging_service, application_pk):
+        limits = self.limits.get(messaging_service) or {}
+        return (
+            self.get_bucket(messaging_service, limits.get('RATE'), limits.get('BURST')),
+            self.get_bucket(
+                f'{messaging_service}:{application_pk}',
+                limits.get('APPLICATION_RATE'),
+                limits.get('APPLICATION_BURST'),
+            ),
+        )
+
+    def acquire(self, messaging_service, application_pk, amount, keepalive=None):
+        """
+        Block until `amount` messages may be sent; return seconds waited.
+
+        `keepalive`, if given, is called before waiting and every `RATE_LIMIT_KEEPALIVE_INTERVAL`
+        seconds of wait, e.g. to keep a lease of the work being throttled; exception it raises ends the wait.
+        """
+        service_bucket, application_bucket = self.get_buckets(messaging_service, application_pk)
+        waits = [bucket.reserve(amount) for bucket in (service_bucket, application_bucket) if bucket.rate]
+        if not application_bucket.rate:
+            # unlimited, yet held back by `block()`; service bucket is never blocked
+            waits.append(application_bucket.get_blocked_for())
+        wait = max(waits)
+        deadline = time.monotonic() + wait
+        remaining = wait
+        while remaining > 0:
+            if keepalive:
+                keepalive()
+                time.sleep(min(remaining, RATE_LIMIT_KEEPALIVE_INTERVAL))
+            else:
+                time.sleep(remaining)
+            remaining = deadline - time.monotonic()
+
+        return wait
+
+    def block(self, messaging_service, application_pk, seconds):
+        """Hold sends of application for `seconds`, as provider quotas are per sender."""
+        self.get_buckets(messaging_service, application_pk)[1].block(seconds)
@@ -0,0 +1,143 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class ClientRegistry:
+    """
+    Construct provider clients on first use, once per process.
+
+    Clients are dropped in forked child processes (e.g. celery prefork workers),
+    so sessions, connection pools and event loops are never shared between processes.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """Register `factory` building client `name`; it is not called until client is requested."""
+        self._factories[name] = factory
+        self._clients.pop(name, None)
+
+    def get(self, name):
+        try:
+            return self._clients[name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = self._factories[name]()
+
+        return self._clients[name]
+
+    def lazy(self, name):
+        """Return proxy resolving client `name` on every attribute access."""
+        return LazyClient(self, name)
+
+    def close(self):
+        """Close and forget all constructed clients."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+
+        for client in clients.values():
+            _close_client(client)
+
+
+class ClientPool:
+    """
+    Bounded per-process LRU pool of provider clients built on demand.
+
+    Least recently used client is closed when pool grows over `max_size`.
+    Like `ClientRegistry`, pool is emptied in forked child processes.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        """Return client stored under `key`, building it with `factory` if absent."""
+        evicted = []
+
+        with self._lock:
+            try:
+                self._clients.move_to_end(key)
+            except KeyError:
+                self._clients[key] = factory()
+                while len(self._clients) > self.max_size:
+                    evicted.append(self._clients.popitem(last=False)[1])
+
+            client = self._clients[key]
+
+        for evicted_client in evicted:
+            _close_client(evicted_client)
+
+        return client
+
+    def __len__(self):
+        return len(self._clients)
+
+    def close(self):
+        """Close and forget all pooled clients."""
+        with self._lock:
+            clients, self._clients = self._clients, OrderedDict()
+
+        for client in clients.values():
+            _close_client(client)
+
+
+def _close_client(client):
+    close = getattr(client, 'close', None)
+    if callable(close):
+        close()
+
+
+class LazyClient:
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, item):
+        return getattr(self._registry.get(self._name), item)
+
+
+registry = ClientRegistry()
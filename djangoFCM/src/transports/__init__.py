@@ -0,0 +1,112 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from djangoFCM.src.ratelimit import RateLimiter
+from djangoFCM.src.registry import ClientPool, registry
+from djangoFCM.src.transports.base import BaseTransport
+
+FCM_TRANSPORT = getattr(settings, 'DJANGOFCM_FCM_TRANSPORT', 'djangoFCM.src.transports.fcm_legacy.FCMLegacyTransport')
+FCM_TRANSPORT_OPTIONS = getattr(settings, 'DJANGOFCM_FCM_TRANSPORT_OPTIONS', {})
+HMS_TRANSPORT = getattr(settings, 'DJANGOFCM_HMS_TRANSPORT', 'djangoFCM.src.transports.hms_legacy.HMSLegacyTransport')
+HMS_TRANSPORT_OPTIONS = getattr(settings, 'DJANGOFCM_HMS_TRANSPORT_OPTIONS', {})
+# max number of per-application transports kept alive in a process
+CLIENT_POOL_SIZE = getattr(settings, 'DJANGOFCM_CLIENT_POOL_SIZE', 64)
+
+
+# messaging service (`Application.MessagingService`) -> transport class, its options and rate limit
+BACKENDS = {
+    'F': {
+        'TRANSPORT': FCM_TRANSPORT,
+        'OPTIONS': FCM_TRANSPORT_OPTIONS,
+    },
+    'H': {
+        'TRANSPORT': HMS_TRANSPORT,
+        'OPTIONS': HMS_TRANSPORT_OPTIONS,
+    },
+    'A': {
+        'TRANSPORT': 'djangoFCM.src.transports.apns.APNsTransport',
+        'OPTIONS': {},
+    },
+    'D': {
+        'TRANSPORT': 'djangoFCM.src.transports.dummy.DummyTransport',
+        'OPTIONS': {},
+    },
+}
+# backends of settings are merged over default ones key by key, so e.g. only `RATE_LIMIT` may be given
+for _messaging_service, _backend in getattr(settings, 'DJANGOFCM_BACKENDS', {}).items():
+    BACKENDS[_messaging_service] = {**BACKENDS.get(_messaging_service, {}), **_backend}
+
+
+def get_transport(path, options) -> BaseTransport:
+    if not path:
+        raise ImproperlyConfigured('Backend has no TRANSPORT')
+    try:
+        transport_class = import_string(path)
+    except ImportError as e:
+        raise ImproperlyConfigured(f'Cannot import transport {path!r}') from e
+
+    return transport_class(**options)
+
+
+def get_backend(messaging_service, credentials=None) -> BaseTransport:
+    """
+    Return transport sending messages of `messaging_service`, constructed on first use.
+
+    Transports for application `credentials` (merged over backend's `OPTIONS`) are kept
+    in `client_pool`, keyed by credentials digest, so applications sharing credentials
+    share transport, and changed credentials get a fresh one.
+    """
+    if messaging_service not in BACKENDS:
+        raise ImproperlyConfigured(f'No backend configured for messaging service {messaging_service!r}')
+
+    if not credentials:
+        return registry.get(f'backend:{messaging_service}')
+
+    backend = BACKENDS[messaging_service]
+    digest = hashlib.sha256(json.dumps(credentials, sort_keys=True, default=str).encode()).hexdigest()
+    return client_pool.get(
+        (messaging_service, digest),
+        lambda: get_transport(backend.get('TRANSPORT'), {**backend.get('OPTIONS', {}), **credentials}),
+    )
+
+
+client_pool = ClientPool(CLIENT_POOL_SIZE)
+rate_limiter = RateLimiter({
+    _messaging_service: _backend.get('RATE_LIMIT')
+    for _messaging_service, _backend in BACKENDS.items()
+})
+
+
+for _messaging_service, _backend in BACKENDS.items():
+    registry.register(
+        f'backend:{_messaging_service}',
+        lambda _backend=_backend: get_transport(_backend.get('TRANSPORT'), _backend.get('OPTIONS', {})),
+    )
+
+fcm_transport = registry.lazy('backend:F')
+hms_transport = registry.lazy('backend:H')
@@ -0,0 +1,131 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import asyncio
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+from djangoFCM.src.registry import registry
+from djangoFCM.src.transports.base import BaseTransport
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+class EventLoopThread:
+    """Event loop running forever in a background daemon thread."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='djangoFCM-event-loop', daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine):
+        """Run `coroutine` on the loop and wait for result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+registry.register('event_loop', EventLoopThread)
+
+
+class AsyncTransport(BaseTransport):
+    """
+    Transport sending every message of batch as separate concurrent request.
+
+    Coroutines of all async transports run on single per-process event loop living in
+    a background thread, so connection pools survive between batches while `send()`
+    stays synchronous. At most `concurrency` requests of transport are in flight at once,
+    multiplexed by HTTP/2 `client` over at most `max_connections` connections to `base_url`.
+
+    Requires `httpx[http2]`.
+    """
+    concurrency = 100
+    base_url = ''
+    max_connections = 10
+    timeout = 10
+
+    def __init__(self, batch_size=None, concurrency=None, max_connections=None, timeout=None, **options):
+        super().__init__(batch_size, **options)
+
+        if httpx is None:
+            raise ImproperlyConfigured(f'{type(self).__name__} requires httpx[http2] to be installed')
+
+        for option, value in (('concurrency', concurrency), ('max_connections', max_connections),
+                              ('timeout', timeout)):
+            if value is not None:
+                setattr(self, option, value)
+
+        self._client = None
+        self._semaphore = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+        return self._client
+
+    def run(self, coroutine):
+        """Run `coroutine` on shared event loop and wait for result."""
+        return registry.get('event_loop').run(coroutine)
+
+    def send(self, tokens, title, body, data):
+        return self.run(self.send_async(tokens, title, body, data))
+
+    async def send_async(self, tokens, title, body, data):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        return list(await asyncio.gather(*(
+            self._send_limited(token, title, body, data) for token in tokens
+        )))
+
+    async def _send_limited(self, token, title, body, data):
+        async with self._semaphore:
+            return await self.send_one(token, title, body, data)
+
+    async def send_one(self, token, title, body, data):
+        """Send message to single `token`, return its `DeliveryResult`."""
+        raise NotImplementedError
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self):
+        self.run(self.aclose())
@@ -0,0 +1,156 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+from djangoFCM.src.delivery import DeliveryResult, get_retry_after
+from djangoFCM.src.transports.aio import AsyncTransport
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+APNS_URL = 'https://api.push.apple.com'
+APNS_SANDBOX_URL = 'https://api.sandbox.push.apple.com'
+
+# errors meaning that token will never be valid again
+APNS_INVALID_TOKEN_ERRORS = frozenset((
+    'BadDeviceToken',
+    'Unregistered',
+    'DeviceTokenNotForTopic',
+))
+# errors caused by APNs being overloaded or failing internally
+APNS_TRANSIENT_ERRORS = frozenset((
+    'TooManyRequests',
+    'InternalServerError',
+    'ServiceUnavailable',
+    'Shutdown',
+))
+
+
+class APNsTransport(AsyncTransport):
+    """
+    Send directly via Apple Push Notification service over pooled HTTP/2 connections.
+
+    APNs accepts one token per request, so every batch is sent as concurrent requests.
+    Provider authentication token (JWT) is reused for `jwt_lifetime` seconds.
+    Message `data` is sent as custom keys next to `aps` dictionary.
+
+    Options:
+        key: path to (or content of) `.p8` signing key
+        key_id, team_id: identifiers of signing key and developer team
+        topic: application bundle id
+        sandbox: use development environment
+        base_url: APNs URL, overrides `sandbox`
+        max_connections: size of connection pool
+        timeout: request timeout in seconds
+
+    Requires `httpx[http2]` and `PyJWT[crypto]`.
+    """
+    batch_size = 500
+    transient_errors = APNS_TRANSIENT_ERRORS
+    jwt_lifetime = 50 * 60
+
+    def __init__(self, batch_size=None, concurrency=None, key=None, key_id=None, team_id=None, topic=None,
+                 sandbox=False, base_url=None, max_connections=None, timeout=None, **options):
+        super().__init__(batch_size, concurrency, max_connections, timeout, **options)
+
+        if not all((key, key_id, team_id, topic)):
+            raise ImproperlyConfigured('APNsTransport requires key, key_id, team_id and topic')
+
+        self.key = self.load_key(key)
+        self.key_id = key_id
+        self.team_id = team_id
+        self.topic = topic
+        self.base_url = base_url or (APNS_SANDBOX_URL if sandbox else APNS_URL)
+
+        self._jwt = None
+        self._jwt_issued_at = 0
+
+    @staticmethod
+    def load_key(key):
+        if '-----BEGIN' in key:
+            return key
+
+        with open(key) as f:
+            return f.read()
+
+    def get_jwt(self):
+        now = int(time.time())
+        if self._jwt is None or now - self._jwt_issued_at >= self.jwt_lifetime:
+            try:
+                import jwt
+            except ImportError as e:  # pragma: no cover
+                raise ImproperlyConfigured('APNsTransport requires PyJWT[crypto] to be installed') from e
+
+            self._jwt = jwt.encode(
+                {'iss': self.team_id, 'iat': now},
+                self.key,
+                algorithm='ES256',
+                headers={'kid': self.key_id},
+            )
+            self._jwt_issued_at = now
+
+        return self._jwt
+
+    def build_message(self, title, body, data):
+        return {
+            **data,
+            'aps': {
+                'alert': {
+                    'title': title,
+                    'body': body,
+                },
+            },
+        }
+
+    async def send_one(self, token, title, body, data):
+        try:
+            response = await self.client.post(
+                f'/3/device/{token}',
+                json=self.build_message(title, body, data),
+                headers={
+                    'authorization': f'bearer {self.get_jwt()}',
+                    'apns-topic': self.topic,
+                    'apns-push-type': 'alert',
+                },
+            )
+        except httpx.HTTPError as e:
+            return DeliveryResult(token, False, error=type(e).__name__)
+
+        if response.status_code == 200:
+            return DeliveryResult(token, True, message_id=response.headers.get('apns-id'))
+
+        try:
+            error = response.json().get('reason') or str(response.status_code)
+        except ValueError:
+            error = str(response.status_code)
+
+        return DeliveryResult(
+            token,
+            False,
+            error=error,
+            invalid_token=error in APNS_INVALID_TOKEN_ERRORS,
+            retry_after=get_retry_after(response.status_code, response.headers),
+        )
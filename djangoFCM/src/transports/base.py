@@ -0,0 +1,55 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from typing import Dict, List, Optional
+
+from djangoFCM.src.delivery import DeliveryResult, NETWORK_ERRORS
+
+
+class BaseTransport:
+    """
+    Deliver one batch of messages to provider.
+
+    Subclasses implement `send()`; `batch_size` is the maximum number of tokens
+    `send()` is called with. Failures with error in `transient_errors` are retried.
+    """
+    batch_size = 500
+    transient_errors = frozenset()
+
+    def __init__(self, batch_size: Optional[int] = None, **options):
+        if batch_size is not None:
+            self.batch_size = batch_size
+        self.options = options
+
+    def send(self, tokens: List[str], title: str, body: str, data: Dict[str, str]) -> List[DeliveryResult]:
+        raise NotImplementedError
+
+    def is_transient(self, result: DeliveryResult) -> bool:
+        """Return whether failed delivery may succeed if retried later."""
+        return not result.success and (
+            result.retry_after is not None
+            or result.error in self.transient_errors
+            or result.error in NETWORK_ERRORS
+        )
+
+    def close(self):
+        """Release resources (connections, threads) held by transport."""
+        pass
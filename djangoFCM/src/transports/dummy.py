@@ -0,0 +1,51 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import threading
+from typing import NamedTuple, Dict, List
+
+from djangoFCM.src.delivery import DeliveryResult
+from djangoFCM.src.transports.base import BaseTransport
+
+
+class RecordedMessage(NamedTuple):
+    tokens: List[str]
+    title: str
+    body: str
+    data: Dict[str, str]
+
+
+class DummyTransport(BaseTransport):
+    """
+    Record messages instead of sending them, every delivery succeeds.
+
+    Sent messages are appended to class-level `outbox`, much like Django's `mail.outbox`.
+    """
+    batch_size = 1000
+    outbox: List[RecordedMessage] = []
+
+    _lock = threading.Lock()
+
+    def send(self, tokens, title, body, data):
+        with self._lock:
+            self.outbox.append(RecordedMessage(list(tokens), title, body, dict(data)))
+
+        return [DeliveryResult(token, True, message_id=f'dummy:{token}') for token in tokens]
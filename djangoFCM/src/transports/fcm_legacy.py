@@ -0,0 +1,46 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from djangoFCM.src.fcm import create_fcm_app, fcm_app, FCM_BATCH_SIZE, FCM_TRANSIENT_ERRORS, parse_fcm_response
+from djangoFCM.src.transports.base import BaseTransport
+
+
+class FCMLegacyTransport(BaseTransport):
+    """
+    Send via FCM legacy HTTP API using `pyfcm`.
+
+    Shared `fcm_app` is used unless own `api_key` is given.
+    """
+    batch_size = FCM_BATCH_SIZE
+    transient_errors = FCM_TRANSIENT_ERRORS
+
+    def __init__(self, batch_size=None, api_key=None, **options):
+        super().__init__(batch_size, **options)
+        self.app = create_fcm_app(api_key) if api_key else fcm_app
+
+    def send(self, tokens, title, body, data):
+        response = self.app.notify_multiple_devices(
+            registration_ids=tokens,
+            message_title=title,
+            message_body=body,
+            extra_notification_kwargs=data,
+        )
+        return parse_fcm_response(tokens, response)
@@ -0,0 +1,159 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import asyncio
+
+from django.core.exceptions import ImproperlyConfigured
+
+from djangoFCM.src.delivery import DeliveryResult, get_retry_after
+from djangoFCM.src.fcm import FCM_BATCH_SIZE
+from djangoFCM.src.transports.aio import AsyncTransport
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+FCM_V1_URL = 'https://fcm.googleapis.com'
+FCM_V1_SCOPES = ('https://www.googleapis.com/auth/firebase.messaging',)
+
+# errors meaning that token will never be valid again
+FCM_V1_INVALID_TOKEN_ERRORS = frozenset((
+    'UNREGISTERED',
+))
+# errors caused by FCM being overloaded or failing internally
+FCM_V1_TRANSIENT_ERRORS = frozenset((
+    'QUOTA_EXCEEDED',
+    'UNAVAILABLE',
+    'INTERNAL',
+))
+
+
+class FCMv1Transport(AsyncTransport):
+    """
+    Send via FCM HTTP v1 API over pooled HTTP/2 connections.
+
+    HTTP v1 API accepts one token per request, so every batch is sent as concurrent
+    requests multiplexed over at most `max_connections` connections.
+    Message `data` is sent as FCM data payload.
+
+    Options:
+        credentials: path to (or dict of) service account JSON, used to obtain OAuth2 access tokens
+        project_id: Firebase project id, defaults to one of service account
+        access_token: static access token, replaces `credentials` (e.g. for local fake FCM server)
+        base_url: FCM API URL
+        max_connections: size of connection pool
+        timeout: request timeout in seconds
+
+    Requires `httpx[http2]` and (unless `access_token` is given) `google-auth`.
+    """
+    batch_size = FCM_BATCH_SIZE
+    transient_errors = FCM_V1_TRANSIENT_ERRORS
+
+    def __init__(self, batch_size=None, concurrency=None, credentials=None, project_id=None, access_token=None,
+                 base_url=FCM_V1_URL, max_connections=None, timeout=None, **options):
+        super().__init__(batch_size, concurrency, max_connections, timeout, **options)
+
+        self.access_token = access_token
+        self.credentials = None if access_token else self.load_credentials(credentials)
+        self.project_id = project_id or getattr(self.credentials, 'project_id', None)
+        if not self.project_id:
+            raise ImproperlyConfigured('FCMv1Transport requires project_id')
+
+        self.base_url = base_url
+        self._token_lock = None
+
+    @staticmethod
+    def load_credentials(credentials):
+        try:
+            from google.oauth2 import service_account
+        except ImportError as e:  # pragma: no cover
+            raise ImproperlyConfigured('FCMv1Transport requires google-auth to be installed') from e
+
+        if not credentials:
+            raise ImproperlyConfigured('FCMv1Transport requires credentials or access_token')
+        if isinstance(credentials, dict):
+            return service_account.Credentials.from_service_account_info(credentials, scopes=FCM_V1_SCOPES)
+
+        return service_account.Credentials.from_service_account_file(credentials, scopes=FCM_V1_SCOPES)
+
+    async def get_access_token(self):
+        if self.access_token:
+            return self.access_token
+
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+
+        async with self._token_lock:
+            if not self.credentials.valid:
+                from google.auth.transport.requests import Request
+
+                await asyncio.get_running_loop().run_in_executor(None, self.credentials.refresh, Request())
+
+        return self.credentials.token
+
+    def build_message(self, token, title, body, data):
+        return {
+            'message': {
+                'token': token,
+                'notification': {
+                    'title': title,
+                    'body': body,
+                },
+                'data': {key: str(value) for key, value in data.items()},
+            }
+        }
+
+    async def send_one(self, token, title, body, data):
+        try:
+            response = await self.client.post(
+                f'/v1/projects/{self.project_id}/messages:send',
+                json=self.build_message(token, title, body, data),
+                headers={'Authorization': f'Bearer {await self.get_access_token()}'},
+            )
+        except httpx.HTTPError as e:
+            return DeliveryResult(token, False, error=type(e).__name__)
+
+        if response.status_code == 200:
+            return DeliveryResult(token, True, message_id=response.json().get('name'))
+
+        error = self.parse_error(response)
+        return DeliveryResult(
+            token,
+            False,
+            error=error,
+            invalid_token=error in FCM_V1_INVALID_TOKEN_ERRORS,
+            retry_after=get_retry_after(response.status_code, response.headers),
+        )
+
+    @staticmethod
+    def parse_error(response):
+        """Extract FCM error code (e.g. `UNREGISTERED`) from error response."""
+        try:
+            error = response.json().get('error') or {}
+        except ValueError:
+            return str(response.status_code)
+
+        for detail in error.get('details') or ():
+            if detail.get('errorCode'):
+                return detail['errorCode']
+
+        return error.get('status') or str(response.status_code)
@@ -0,0 +1,209 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from djangoFCM.src.delivery import DeliveryResult, get_retry_after
+from djangoFCM.src.hms import HMS_BATCH_SIZE, HMS_TRANSIENT_ERRORS, parse_hms_response
+from djangoFCM.src.ratelimit import CacheLock
+from djangoFCM.src.transports.aio import AsyncTransport
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+HMS_AUTH_URL = 'https://oauth-login.cloud.huawei.com/oauth2/v3/token'
+HMS_PUSH_URL = 'https://push-api.cloud.huawei.com'
+
+
+class HMSTransport(AsyncTransport):
+    """
+    Send via HMS push API concurrently over pooled HTTP/2 connections.
+
+    Every batch is split into requests of `request_size` tokens sent concurrently.
+    OAuth access token is cached in Django cache, shared by all workers, and refreshed
+    `token_refresh_margin` seconds before it expires by single worker at a time.
+
+    Options:
+        client_id, client_secret, project_id: HMS credentials, default to `DJANGOFCM_HMS_*` settings
+        request_size: tokens per request
+        auth_url, push_url: HMS API URLs
+        max_connections: size of connection pool
+        timeout: request timeout in seconds
+
+    Requires `httpx[http2]`.
+    """
+    batch_size = HMS_BATCH_SIZE
+    transient_errors = HMS_TRANSIENT_ERRORS
+    concurrency = 10
+    request_size = 100
+    token_refresh_margin = 300
+    # seconds token refresh lock is held (and waited for) at most
+    token_lock_timeout = 30
+
+    def __init__(self, batch_size=None, concurrency=None, client_id=None, client_secret=None, project_id=None,
+                 request_size=None, auth_url=HMS_AUTH_URL, push_url=HMS_PUSH_URL, max_connections=None,
+                 timeout=None, **options):
+        super().__init__(batch_size, concurrency, max_connections, timeout, **options)
+
+        self.client_id = client_id or settings.DJANGOFCM_HMS_CLIENT_ID
+        self.client_secret = client_secret or settings.DJANGOFCM_HMS_SECRET
+        self.project_id = project_id or getattr(settings, 'DJANGOFCM_HMS_PROJECT_ID', None)
+        self.auth_url = auth_url
+        self.base_url = push_url
+        if request_size is not None:
+            self.request_size = request_size
+
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def cache_key(self):
+        return f'djangoFCM:hms:access_token:{self.client_id}'
+
+    @property
+    def send_path(self):
+        if self.project_id:
+            return f'/v2/{self.project_id}/messages:send'
+        return f'/v1/{self.client_id}/messages:send'
+
+    def get_access_token(self, rejected_token=None):
+        """
+        Return cached access token, fetching new one if it is missing, about to expire or `rejected_token`.
+
+        Only worker holding refresh lock fetches token. While cached token is still valid others
+        keep using it, otherwise they wait for the lock and take token fetched by its holder.
+        """
+        cached = cache.get(self.cache_key)
+        is_valid = cached and cached['access_token'] != rejected_token and cached['expires_at'] > time.time()
+        if is_valid and cached['expires_at'] - self.token_refresh_margin > time.time():
+            return cached['access_token']
+
+        lock = CacheLock(cache, f'{self.cache_key}:lock', timeout=self.token_lock_timeout)
+        if not lock.acquire(blocking=not is_valid) and is_valid:
+            # somebody else is refreshing already
+            return cached['access_token']
+
+        try:
+            with self._refresh_lock:
+                # token might have been refreshed by another worker or thread while waiting for lock
+                cached = cache.get(self.cache_key)
+                if (cached and cached['access_token'] != rejected_token
+                        and cached['expires_at'] - self.token_refresh_margin > time.time()):
+                    return cached['access_token']
+
+                response = httpx.post(
+                    self.auth_url,
+                    data={
+                        'grant_type': 'client_credentials',
+                        'client_id': self.client_id,
+                        'client_secret': self.client_secret,
+                    },
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                payload = response.json()
+
+                expires_in = int(payload.get('expires_in', 3600))
+                cache.set(
+                    self.cache_key,
+                    {'access_token': payload['access_token'], 'expires_at': time.time() + expires_in},
+                    timeout=expires_in,
+                )
+                return payload['access_token']
+        finally:
+            lock.release()
+
+    def build_message(self, tokens, title, body, data):
+        return {
+            'validate_only': False,
+            'message': {
+                'token': tokens,
+                'data': json.dumps(data),
+                'android': {
+                    'notification': {
+                        'title': title,
+                        'body': body,
+                        'click_action': {
+                            'type': 3,
+                        },
+                    },
+                },
+            },
+        }
+
+    def send(self, tokens, title, body, data):
+        return self.run(self.send_async(tokens, title, body, data, self.get_access_token()))
+
+    async def send_async(self, tokens, title, body, data, access_token=None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        requests = [tokens[i:i + self.request_size] for i in range(0, len(tokens), self.request_size)]
+        responses = await asyncio.gather(*(
+            self._send_limited(request_tokens, title, body, data, access_token) for request_tokens in requests
+        ))
+
+        return [result for results in responses for result in results]
+
+    async def _send_limited(self, tokens, title, body, data, access_token=None):
+        async with self._semaphore:
+            return await self.send_request(tokens, title, body, data, access_token)
+
+    async def send_request(self, tokens, title, body, data, access_token):
+        """Send message to `tokens` in single request, return their `DeliveryResult`s."""
+        message = self.build_message(tokens, title, body, data)
+        try:
+            response = await self.client.post(
+                self.send_path,
+                json=message,
+                headers={'Authorization': f'Bearer {access_token}'},
+            )
+            if response.status_code == 401:
+                # token was revoked before its expiration, fetch new one and try again
+                access_token = await asyncio.get_running_loop().run_in_executor(
+                    None, self.get_access_token, access_token,
+                )
+                response = await self.client.post(
+                    self.send_path,
+                    json=message,
+                    headers={'Authorization': f'Bearer {access_token}'},
+                )
+        except httpx.HTTPError as e:
+            return [DeliveryResult(token, False, error=type(e).__name__) for token in tokens]
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {'code': str(response.status_code)}
+
+        results = parse_hms_response(tokens, payload)
+        retry_after = get_retry_after(response.status_code, response.headers)
+        if retry_after is not None:
+            results = [result._replace(retry_after=retry_after) for result in results]
+
+        return results
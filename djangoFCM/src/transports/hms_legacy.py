@@ -0,0 +1,46 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from djangoFCM.src.hms import create_hms_app, hms_app, HMS_BATCH_SIZE, HMS_TRANSIENT_ERRORS, parse_hms_response
+from djangoFCM.src.transports.base import BaseTransport
+
+
+class HMSLegacyTransport(BaseTransport):
+    """
+    Send via HMS push API using `pyhcm`.
+
+    Shared `hms_app` is used unless own `client_id` is given.
+    """
+    batch_size = HMS_BATCH_SIZE
+    transient_errors = HMS_TRANSIENT_ERRORS
+
+    def __init__(self, batch_size=None, client_id=None, client_secret=None, project_id=None, **options):
+        super().__init__(batch_size, **options)
+        self.app = create_hms_app(client_id, client_secret, project_id) if client_id else hms_app
+
+    def send(self, tokens, title, body, data):
+        response = self.app.notify_multiple_devices(
+            registration_ids=tokens,
+            message_title=title,
+            message_body=body,
+            data=data,
+        )
+        return parse_hms_response(tokens, response)
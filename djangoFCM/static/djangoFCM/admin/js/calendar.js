@@ -0,0 +1,54 @@
+/******************************************************************************
+ * djangoFCM — Django app which stores, manages FCM push tokens               *
+ * and interacts with them.                                                   *
+ * Copyright (C) 2021-2021 omelched                                           *
+ *                                                                            *
+ * This file is part of djangoFCM.                                            *
+ *                                                                            *
+ * djangoFCM is free software: you can redistribute it and/or modify          *
+ * it under the terms of the GNU Affero General Public License as published   *
+ * by the Free Software Foundation, either version 3 of the License, or       *
+ * (at your option) any later version.                                        *
+ *                                                                            *
+ * djangoFCM is distributed in the hope that it will be useful,               *
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of             *
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the              *
+ * GNU Affero General Public License for more details.                        *
+ *                                                                            *
+ * You should have received a copy of the GNU Affero General Public License   *
+ * along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.        *
+ ******************************************************************************/
+
+const $ = django.jQuery
+
+function setHeatmapDrillDown() {
+
+  let heatmap = $(".calendar-heatmap");
+  let container = $(".calendar-heatmap-events");
+
+  function renderEvent(event) {
+    let item = $("<div>").addClass("calendar-events-item").addClass(event.is_sent ? "--sent" : "--pending");
+    item.append($("<h3>").text(`${event.time} — ${event.title}`));
+    item.append($("<p>").text(event.body));
+    return item
+  }
+
+  function showDay(e) {
+    let date = $(e.currentTarget).data("date");
+
+    fetch(`${heatmap.data("day-url")}?date=${date}`)
+      .then(res => res.json())
+      .then(json => {
+        container.empty();
+        container.append($("<h2>").text(json.date));
+        json.events.forEach(event => container.append(renderEvent(event)));
+      })
+  }
+
+  heatmap.find("td[data-date]").on("click", showDay)
+
+}
+
+$(document).ready(function() {
+  setHeatmapDrillDown()
+});
@@ -170,7 +170,7 @@ function setForeignKeyInterpreter() {
       currentModel = metadata.find(model => model.name === currentField.attributes.to);
     }
 
-    if (currentField.type === 'foreign-key') {
+    if (currentField.type === 'foreign-key' || currentField.type === 'reverse-relation') {
       let selectWidget = showValueSelect(rowNumber);
       fillChoicesValueSelect(selectWidget, prevModel, currentField)
     } else {
@@ -179,29 +179,80 @@ function setForeignKeyInterpreter() {
   }
 
   function fillChoicesValueSelect(selectWidget, model, descriptor) {
+    selectWidget.dataset.modelName = model.name;
+    selectWidget.dataset.fieldName = descriptor.name;
+    let searchWidget = $(selectWidget).siblings('.--value_search')[0];
+    searchWidget.value = "";
+    selectWidget.clearChildren();
+    fetchChoices(selectWidget, "", null);
+  }
+
+  function fetchChoices(selectWidget, query, after) {
+    let params = new URLSearchParams({
+      model_name: selectWidget.dataset.modelName,
+      field_name: selectWidget.dataset.fieldName,
+      q: query,
+    });
+    if (after !== null) {
+      params.set('after', after);
+    }
+    // responses of outdated searches are dropped
+    let requestId = (parseInt(selectWidget.dataset.requestId || "0", 10) + 1).toString();
+    selectWidget.dataset.requestId = requestId;
 
-    let objectsList = [];
-    fetch(`../../fetcher?model_name=${model.name}&field_name=${descriptor.name}`)
+    fetch(`../../fetcher?${params}`)
       .then(res => res.json())
-      .then(json => {objectsList = json.results})
-      .then(() => {
-        selectWidget.clearChildren();
-        for (let object of objectsList) {
+      .then(json => {
+        if (selectWidget.dataset.requestId !== requestId || json.errors) {
+          return
+        }
+        $(selectWidget).find('option.--more').remove();
+        for (let object of json.results) {
           let opt = document.createElement('option')
           opt.value = object.key
-          opt.innerHTML = object.name
+          opt.textContent = object.name
           selectWidget.appendChild(opt)
         }
+        if (json.next !== null) {
+          let more = document.createElement('option')
+          more.value = ""
+          more.textContent = "…"
+          more.className = "--more"
+          more.dataset.after = json.next
+          more.dataset.query = query
+          selectWidget.appendChild(more)
+        }
       }
     )
   }
 
+  function loadMoreChoices(e) {
+    let selectWidget = e.target;
+    let selected = selectWidget.options[selectWidget.selectedIndex];
+    if (selected && selected.classList.contains('--more')) {
+      selectWidget.selectedIndex = Math.max(selectWidget.selectedIndex - 1, 0);
+      fetchChoices(selectWidget, selected.dataset.query, selected.dataset.after);
+    }
+  }
+
+  function searchChoices(e) {
+    let searchWidget = e.target;
+    let selectWidget = $(searchWidget).siblings("[id$='value_select']")[0];
+    clearTimeout(searchWidget.searchTimeout);
+    searchWidget.searchTimeout = setTimeout(() => {
+      selectWidget.clearChildren();
+      fetchChoices(selectWidget, searchWidget.value.trim(), null);
+    }, 300);
+  }
+
   function showValueSelect(rowNumber) {
     let inputWidget = $(`.composer [id$='value'][id^='id_form-${rowNumber}']`)
     let selectWidget = $(`.composer [id$='value_select'][id^='id_form-${rowNumber}']`)
+    let searchWidget = selectWidget.siblings('.--value_search')
     inputWidget.value = "";
     inputWidget.addClass('--hidden')
     selectWidget.removeClass('--hidden')
+    searchWidget.removeClass('--hidden')
 
     return selectWidget[0]
   }
@@ -209,8 +260,10 @@ function setForeignKeyInterpreter() {
   function showValueInput(rowNumber) {
     let inputWidget = $(`.composer [id$='value'][id^='id_form-${rowNumber}']`)
     let selectWidget = $(`.composer [id$='value_select'][id^='id_form-${rowNumber}']`)
+    let searchWidget = selectWidget.siblings('.--value_search')
     selectWidget.value = "";
     selectWidget.addClass('--hidden')
+    searchWidget.addClass('--hidden')
     inputWidget.removeClass('--hidden')
   }
 
@@ -222,10 +275,44 @@ function setForeignKeyInterpreter() {
   attributeFields.each(function () {
     $(this).on("change", refreshValueInput)
   })
+  $(".composer [id$='value_select']").each(function () {
+    $(this).on("change", loadMoreChoices)
+  })
+  $(".composer .--value_search").each(function () {
+    $(this).on("input", searchChoices)
+  })
+
+}
+
+function setAudienceEstimator() {
+
+  function estimate(e) {
+    e.preventDefault();
+    let form = $(e.target).closest("form");
+    // only composer fields, other ones (e.g. CSRF token) must not end up in URL
+    let prefix = $("table.composer").data("prefix");
+    let conditions = form.find(`[name^='${prefix}-']`).serialize();
+    let approximate = $(".composer-estimate [name='approximate']").prop("checked") ? 1 : 0;
+    let result = $(".composer-estimate .--result");
+
+    fetch(`../../estimate?${conditions}&approximate=${approximate}`)
+      .then(res => res.json())
+      .then(json => {
+        if (json.errors) {
+          result.text(JSON.stringify(json.errors));
+          return
+        }
+        let sample = json.sample.map(token => token.push_token).join(", ");
+        result.text(`${json.approximate ? "~" : ""}${json.count} (${sample})`);
+      })
+  }
+
+  $(".composer-estimate button").on("click", estimate)
 
 }
 
 $(document).ready(function() {
   formset()
   setForeignKeyInterpreter()
+  setAudienceEstimator()
 });
@@ -19,18 +19,123 @@
 #  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
 # ******************************************************************************
 
-from celery import shared_task
+from celery import shared_task, chord
+from celery.backends.base import DisabledBackend
+from celery.signals import worker_process_shutdown
 from celery.utils.log import get_task_logger
+from django.conf import settings
 
-from .models import Notification
+from .models import Notification, NotificationSendRange, PushToken
+from .src.heartbeat import heartbeats
 
 logger = get_task_logger(__name__)
 
+# number of recipients handled by one batch-sending sub-task
+SEND_RANGE_SIZE = getattr(settings, 'DJANGOFCM_SEND_RANGE_SIZE', 10000)
+# times failed batch-sending sub-task is retried, resuming from its checkpoint
+SEND_TASK_MAX_RETRIES = getattr(settings, 'DJANGOFCM_SEND_TASK_MAX_RETRIES', 5)
+# max number of due notifications started by one `dispatch_push_notifications` run
+DISPATCH_BATCH_SIZE = getattr(settings, 'DJANGOFCM_DISPATCH_BATCH_SIZE', 100)
+
 
 @shared_task
-def send_push_notification(notification_pk):
+def dispatch_push_notifications():
+    """
+    Start sending of scheduled notifications which are due.
+
+    Meant to be run periodically by beat when `DJANGOFCM_USE_DISPATCHER` is on;
+    notifications are claimed, so overlapping runs never start the same one twice.
+    """
+    while True:
+        notification_pks = Notification.objects.claim_due(DISPATCH_BATCH_SIZE)
+        for notification_pk in notification_pks:
+            send_push_notification.delay(notification_pk)
+
+        if len(notification_pks) < DISPATCH_BATCH_SIZE:
+            return
+
+
+@shared_task(bind=True, acks_late=True)
+def send_push_notification(self, notification_pk):
+    """
+    Coordinate sending of notification.
+
+    Recipients are split into keyset-paginated ranges of `push_token`, stored as `NotificationSendRange`s
+    and sent in parallel by `send_push_notification_batch` sub-tasks. When all of them are done,
+    `mark_push_notification_sent` callback marks notification as sent.
+
+    Running it again for interrupted notification resumes unfinished ranges only.
+    """
     notification = Notification.objects.get(pk=notification_pk)
-    if notification.recipients_composer_conditions:
+    if notification.sent:
+        return
+
+    if notification.composer_conditions and not notification.send_ranges.exists():
         notification.compile_recipients()
 
-    notification.send()
+    send_ranges = NotificationSendRange.objects.plan(notification, SEND_RANGE_SIZE)
+    callback = mark_push_notification_sent.si(notification_pk)
+
+    if isinstance(self.app.backend, DisabledBackend):
+        # chords require result backend, fallback to sending in-process
+        logger.warning('Result backend is disabled, sending notification %s in-process', notification_pk)
+        for send_range in send_ranges:
+            send_range.send()
+        callback()
+    elif not send_ranges:
+        callback.delay()
+    else:
+        chord(
+            send_push_notification_batch.si(send_range.pk)
+            for send_range in send_ranges
+        )(callback)
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    autoretry_for=(Exception,),
+    max_retries=SEND_TASK_MAX_RETRIES,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+)
+def send_push_notification_batch(self, send_range_pk):
+    """
+    Send one `NotificationSendRange`, resuming after its checkpoint.
+
+    On failure task is retried with jittered exponential backoff; acknowledged late,
+    it is also redelivered if worker dies. Completed range is never sent again, and range
+    leased by another worker is not sent concurrently (see `NotificationSendRange.send()`).
+    """
+    send_range = NotificationSendRange.objects.select_related('notification').filter(pk=send_range_pk).first()
+    if send_range is None:
+        logger.warning('Send range %s no longer exists', send_range_pk)
+        return
+
+    def report_progress(processed, total):
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={'processed': processed, 'total': total})
+
+    send_range.send(progress_callback=report_progress)
+
+
+@shared_task
+def mark_push_notification_sent(notification_pk):
+    notification = Notification.objects.get(pk=notification_pk)
+    # callback of duplicate coordinator (e.g. redelivered one) finds notification sent already
+    if not notification.sent:
+        notification.mark_sent()
+
+
+@shared_task
+def expire_push_tokens():
+    """Deactivate or delete expired push tokens, see `PushToken.objects.expire()`."""
+    affected = PushToken.objects.expire()
+    logger.info('Expired %d push tokens', affected)
+
+
+@worker_process_shutdown.connect
+def flush_heartbeats(**kwargs):
+    """Write buffered token refreshes of pool process, which exits without running `atexit` handlers."""
+    heartbeats.flush()
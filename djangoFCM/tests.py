@@ -0,0 +1,182 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from djangoFCM.models import Application, Notification, PushToken
+from djangoFCM.src.fcm import FCM_MISSING_RESULT, FCM_TRANSIENT_ERRORS, parse_fcm_response
+from djangoFCM.src.ratelimit import CacheTokenBucket, RateLimiter
+
+
+class CompileRecipientsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(username='user')
+        other_user = get_user_model().objects.create(username='other')
+        application = Application.objects.create(name='application', messaging_service='F')
+        PushToken.objects.bulk_create([
+            PushToken(push_token=f'token{i:02}', user=cls.user if i % 2 else other_user, application=application)
+            for i in range(10)
+        ])
+
+    def create_notification(self, name):
+        notification = Notification(name=name, send_on=timezone.now() + timedelta(days=1))
+        notification.composer_conditions = [{'attribute': 'user', 'value': self.user.pk}]
+        notification.save()
+        return notification
+
+    def assertNoTokensFetched(self, queries):
+        token_columns = f'SELECT {connection.ops.quote_name(PushToken._meta.db_table)}.'
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith(token_columns)])
+
+    def test_composed_recipients_are_not_fetched(self):
+        notification = self.create_notification('composed')
+        with CaptureQueriesContext(connection) as queries:
+            notification.compile_recipients()
+
+        self.assertNoTokensFetched(queries.captured_queries)
+        self.assertEqual(notification.recipients.count(), 5)
+
+    def test_reused_recipients_are_not_fetched(self):
+        self.create_notification('source').compile_recipients()
+        notification = self.create_notification('reusing')
+        self.assertIsNotNone(notification.get_reusable_recipients())
+
+        with CaptureQueriesContext(connection) as queries:
+            notification.compile_recipients()
+
+        self.assertNoTokensFetched(queries.captured_queries)
+        self.assertEqual(notification.recipients.count(), 5)
+
+
+class ParseFCMResponseTestCase(SimpleTestCase):
+    def test_tokens_without_results_fail_transiently(self):
+        results = parse_fcm_response(
+            ['token0', 'token1', 'token2'],
+            {'results': [{'message_id': 'message0'}]},
+        )
+
+        self.assertEqual([result.push_token for result in results], ['token0', 'token1', 'token2'])
+        self.assertTrue(results[0].success)
+        for result in results[1:]:
+            self.assertFalse(result.success)
+            self.assertEqual(result.error, FCM_MISSING_RESULT)
+            self.assertIn(result.error, FCM_TRANSIENT_ERRORS)
+
+    def test_tokens_without_response_fail(self):
+        results = parse_fcm_response(['token0', 'token1'], None)
+
+        self.assertEqual([(result.push_token, result.success) for result in results],
+                         [('token0', False), ('token1', False)])
+
+
+class RateLimiterTestCase(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.rate_limiter = RateLimiter({}, bucket_class=CacheTokenBucket)
+
+    def test_unlimited_application_reads_bucket_once(self):
+        cache = caches['default']
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add, \
+                mock.patch.object(cache, 'get', wraps=cache.get) as get, \
+                mock.patch.object(cache, 'set', wraps=cache.set) as set_:
+            self.assertEqual(self.rate_limiter.acquire('F', 1, 500), 0.0)
+
+        self.assertEqual((add.call_count, get.call_count, set_.call_count), (0, 1, 0))
+
+    def test_unlimited_application_is_blocked(self):
+        self.rate_limiter.block('F', 1, 0.05)
+        self.assertGreater(self.rate_limiter.acquire('F', 1, 500), 0.0)
+        self.assertEqual(self.rate_limiter.acquire('F', 2, 500), 0.0)
+
+
+class ReconcileSchedulesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(username='user')
+        application = Application.objects.create(name='application', messaging_service='F')
+        cls.tokens = PushToken.objects.bulk_create([
+            PushToken(push_token=f'token{i:02}', user=cls.user, application=application) for i in range(3)
+        ])
+
+    def create_notification(self, name, **kwargs):
+        return Notification.objects.create(name=name, send_on=timezone.now() + timedelta(days=1), **kwargs)
+
+    def test_recipient_edits_are_reconciled_once_per_transaction(self):
+        notification = self.create_notification('edited')
+        with mock.patch.object(type(Notification.objects), 'reconcile_schedules') as reconcile_schedules:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with transaction.atomic():
+                    for token in self.tokens:
+                        token.notifications.add(notification)
+
+        self.assertEqual(len(callbacks), 1)
+        reconcile_schedules.assert_called_once_with({notification.pk})
+
+    def test_recipient_edits_reset_compiled_recipients_once_per_transaction(self):
+        notification = self.create_notification('edited', recipients_compiled_on=timezone.now())
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for token in self.tokens:
+                        token.notifications.add(notification)
+
+        column = connection.ops.quote_name('recipients_compiled_on')
+        self.assertEqual(len([query for query in queries.captured_queries if f'SET {column}' in query['sql']]), 1)
+        notification.refresh_from_db()
+        self.assertIsNone(notification.recipients_compiled_on)
+
+    def test_recipient_edits_reschedule_notification(self):
+        notification = self.create_notification('edited')
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.recipients.add(*self.tokens)
+        notification.refresh_from_db()
+        self.assertTrue(notification.scheduled)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.recipients.clear()
+        notification.refresh_from_db()
+        self.assertFalse(notification.scheduled)
+
+    @mock.patch('djangoFCM.models.notification.model.MATERIALIZE_RECIPIENTS', False)
+    @mock.patch('djangoFCM.models.notification.manager.MATERIALIZE_RECIPIENTS', False)
+    def test_composed_notification_is_kept_scheduled_without_materialized_recipients(self):
+        notification = self.create_notification('composed')
+        notification.composer_conditions = [{'attribute': 'user', 'value': self.user.pk}]
+        notification.save()
+        notification.compile_recipients()
+        notification.refresh_from_db()
+        self.assertTrue(notification.scheduled)
+        self.assertFalse(notification.recipients.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.recipients.add(self.tokens[0])
+            notification.recipients.remove(self.tokens[0])
+        notification.refresh_from_db()
+        self.assertTrue(notification.scheduled)
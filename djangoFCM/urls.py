@@ -3,9 +3,15 @@ from django.contrib import admin
 
 from djangoFCM.views.admin.metadata import MetadataJsonView
 from djangoFCM.views.admin.fetcher import DataFetcherJsonView
-from djangoFCM.views.admin.calendar import CalendarView
+from djangoFCM.views.admin.calendar import CalendarView, CalendarDayJsonView
+from djangoFCM.views.admin.estimator import AudienceEstimateJsonView
+from djangoFCM.views.registration import PushTokenRegistrationJsonView
 
 urlpatterns = (
     path("admin/metadata",  MetadataJsonView.as_view(), name='metadata'),
     path("admin/fetcher",   DataFetcherJsonView.as_view(admin_site=admin.site), name='fetcher'),
+    path("admin/estimate",  AudienceEstimateJsonView.as_view(), name='estimate'),
+    path("admin/calendar",  CalendarView.as_view(), name='calendar'),
+    path("admin/calendar/day", CalendarDayJsonView.as_view(), name='calendar_day'),
+    path("push_tokens",     PushTokenRegistrationJsonView.as_view(), name='register'),
 )
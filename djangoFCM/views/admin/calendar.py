@@ -1,11 +1,13 @@
 import calendar
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 
 from django.conf import settings
 from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
 from django.forms import Media
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponseBadRequest, JsonResponse
 from django.urls import reverse
+from django.utils import timezone
 from django.views import generic
 
 from djangoFCM.models import Notification
@@ -23,8 +25,22 @@ class CalendarView(generic.ListView):
                 request.get_full_path(),
                 reverse('admin:login', ),
             )
+
+        try:
+            self.week, self.day = self.get_day(request)
+        except ValueError:
+            return HttpResponseBadRequest('Invalid date')
+
         return super().get(request, *args, **kwargs)
 
+    @staticmethod
+    def get_day(request: HttpRequest):
+        """Return whether week agenda is requested and its day, or first day of requested month."""
+        week = request.GET.get('week', None)
+        if week:
+            return True, date.fromisoformat(week)
+        return False, get_date(request.GET.get('month', None))
+
     def has_perm(self, request: HttpRequest):
         """Check if user has permission to access the related model."""
         return request.user and request.user.is_staff
@@ -32,20 +48,31 @@ class CalendarView(generic.ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # use today's date for the calendar
-        d = get_date(self.request.GET.get('month', None))
-
-        # Instantiate our calendar class with today's year and date
-        cal = self.calendar_class(d.year,
-                                  d.month,
-                                  self.queryset.filter(send_on__month=d.month, send_on__year=d.year),
-                                  'send_on')
-        context['calendar'] = cal.to_context()
+        d = self.day
+        if self.week:
+            # week agenda of given day
+            cal = self.calendar_class(d.year, d.month, self.queryset, 'send_on')
+            context['calendar'] = cal.to_week_context(d)
+            context['prev_week'] = f'week={d - timedelta(days=7)}'
+            context['next_week'] = f'week={d + timedelta(days=7)}'
+            context['month'] = f'month={d.year}-{d.month}'
+        else:
+            # use today's date for the calendar
+            cal = self.calendar_class(d.year, d.month, self.queryset, 'send_on')
+            if self.request.GET.get('heatmap'):
+                # counts only, events of day are loaded on demand from `CalendarDayJsonView`
+                context['calendar'] = cal.to_heatmap_context()
+                context['heatmap'] = True
+            else:
+                context['calendar'] = cal.to_context()
+            context['week'] = f'week={d}'
+            context['month'] = f'month={d.year}-{d.month}'
 
         extra = '' if settings.DEBUG else '.min'
         js = [
             'admin/js/vendor/jquery/jquery%s.js' % extra,
             'admin/js/jquery.init.js',
+            'djangoFCM/admin/js/calendar.js',
         ]
         css = {
             'all': [
@@ -56,15 +83,41 @@ class CalendarView(generic.ListView):
 
         context['prev_month'] = prev_month(d)
         context['next_month'] = next_month(d)
+        if context.get('heatmap'):
+            context['prev_month'] += '&heatmap=1'
+            context['next_month'] += '&heatmap=1'
 
         return context
 
 
+class CalendarDayJsonView(generic.View):
+    """Return events of `date` day for calendar heatmap drill-down."""
+    queryset = Notification.objects.all()
+    calendar_class = DjangoCalendar
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        try:
+            day = date.fromisoformat(request.GET.get('date', ''))
+        except ValueError:
+            return JsonResponse({'errors': ['Invalid date']}, status=400)
+
+        cal = self.calendar_class(day.year, day.month, self.queryset, 'send_on')
+        events = cal.get_events_by_date(day, day + timedelta(days=1)).get(day, [])
+        return JsonResponse({'date': day.isoformat(), 'events': events})
+
+    def has_perm(self, request: HttpRequest):
+        """Check if user has permission to access the related model."""
+        return request.user and request.user.is_staff
+
+
 def get_date(req_day):
     if req_day:
         year, month = (int(x) for x in req_day.split('-'))
-        return datetime(year, month, day=1)
-    return datetime.today()
+        return date(year, month, day=1)
+    return timezone.localdate()
 
 
 def prev_month(d):
@@ -0,0 +1,104 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, PermissionDenied, ValidationError
+from django.forms import formset_factory
+from django.http import JsonResponse, HttpRequest
+from django.views.generic.list import BaseListView
+
+from djangoFCM.admin.models import NotificationAdmin
+from djangoFCM.models import PushToken
+from djangoFCM.src.audience import estimate_count
+from djangoFCM.src.conditions import filter_by_conditions, hash_conditions
+
+AUDIENCE_CACHE_TIMEOUT = getattr(settings, 'DJANGOFCM_AUDIENCE_CACHE_TIMEOUT', 60)
+
+
+class AudienceEstimateJsonView(BaseListView):
+    """Handle RecipientsComposer's requests for audience size and sample."""
+    paginate_by = None
+    admin_site = None
+    form_class = NotificationAdmin.RecipientsComposerForm
+    sample_size = 10
+    max_sample_size = 100
+
+    def get(self, request, *args, **kwargs):
+
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        formset = formset_factory(self.form_class, extra=0)(request.GET)
+        if not formset.is_valid():
+            return JsonResponse({'errors': formset.errors}, status=400)
+
+        approximate = request.GET.get('approximate') in ('1', 'true')
+        try:
+            sample_size = int(request.GET.get('sample', self.sample_size))
+        except ValueError:
+            sample_size = -1
+        if sample_size < 0:
+            return JsonResponse({'errors': ['`sample` must be a non-negative integer.']}, status=400)
+        sample_size = min(sample_size, self.max_sample_size)
+
+        conditions = [condition for condition in formset.cleaned_data if condition]
+        cache_key = f'djangoFCM:audience:{hash_conditions(conditions)}:{int(approximate)}:{sample_size}'
+        result = cache.get(cache_key)
+        if result is None:
+            try:
+                result = self.get_data(conditions, approximate, sample_size)
+            except ValidationError as e:
+                return JsonResponse({'errors': e.messages}, status=400)
+            except ValueError as e:
+                return JsonResponse({'errors': [str(e)]}, status=400)
+            cache.set(cache_key, result, AUDIENCE_CACHE_TIMEOUT)
+
+        return JsonResponse(result)
+
+    def get_data(self, conditions, approximate, sample_size):
+        queryset = PushToken.objects.active()
+        if conditions:
+            queryset = filter_by_conditions(queryset, conditions)
+
+        try:
+            count = estimate_count(queryset) if approximate else queryset.count()
+        except EmptyResultSet:
+            count = 0
+
+        return {
+            'count': count,
+            'approximate': approximate,
+            'sample': [
+                {
+                    'push_token': push_token,
+                    'user': user_id,
+                    'application': application_id,
+                }
+                for push_token, user_id, application_id in queryset.values_list(
+                    'push_token', 'user_id', 'application_id',
+                )[:sample_size]
+            ],
+        }
+
+    def has_perm(self, request: HttpRequest):
+        """Check if user has permission to access the related model."""
+        return request.user and request.user.is_staff
@@ -1,33 +1,120 @@
+import json
+
 from django.apps import apps
-from django.core.exceptions import PermissionDenied, FieldDoesNotExist
-from django.http import JsonResponse, HttpRequest
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import JsonResponse, HttpResponse, HttpRequest
 from django.views.generic.list import BaseListView
 
+from djangoFCM.src.modelgraph import ModelGraphMemo
+
+# objects returned per page of DataComposer's value picker
+FETCHER_PAGE_SIZE = getattr(settings, 'DJANGOFCM_FETCHER_PAGE_SIZE', 50)
+# upper bound of `limit` clients may request
+FETCHER_MAX_PAGE_SIZE = getattr(settings, 'DJANGOFCM_FETCHER_MAX_PAGE_SIZE', 500)
+
 
 class DataFetcherJsonView(BaseListView):
-    """Handle DataComposer's requests for data."""
-    paginate_by = None
+    """
+    Handle DataComposer's requests for data.
+
+    Objects are returned by pages of `limit` ordered by the key the composer filters on, next page
+    starts after `after` key (keyset pagination). `q` is searched by `search_fields` of the related
+    model's admin. Response is `{"results": [{"key": ..., "name": ...}], "next": <key or null>}`.
+    """
+    paginate_by = FETCHER_PAGE_SIZE
+    max_paginate_by = FETCHER_MAX_PAGE_SIZE
     admin_site = None
     model_admin = None
+    # columns not loaded to render objects' names
+    deferred_field_types = (models.TextField, models.BinaryField, models.JSONField)
+
+    _memo = ModelGraphMemo()
 
     def get(self, request, *args, **kwargs):
 
         if not self.has_perm(request):
             raise PermissionDenied
 
-        self.model, self.model_admin = self.process_request(request)
-        return JsonResponse(
-            {
-                'results': [
-                    {
-                        'key': i.pk,
-                        'name': str(i)
-                    } for i in self.model_admin.get_queryset(self.request)
-                ]
-            },
-            json_dumps_params={'indent': 2}
+        self.model, self.model_admin, key_field = self.process_request(request)
+
+        try:
+            after = request.GET.get('after')
+            after = key_field.to_python(after) if after not in (None, '') else None
+            limit = self.get_limit(request)
+        except ValidationError as e:
+            return JsonResponse({'errors': e.messages}, status=400)
+
+        queryset = self.get_queryset_for(key_field, request.GET.get('q', '').strip())
+        if after is not None:
+            queryset = queryset.filter(**{f'{key_field.attname}__gt': after})
+
+        objects = list(queryset[:limit + 1])
+        has_next = len(objects) > limit
+        objects = objects[:limit]
+
+        data = {
+            'results': [{'key': key_field.value_from_object(obj), 'name': str(obj)} for obj in objects],
+            'next': key_field.value_from_object(objects[-1]) if has_next else None,
+        }
+        return HttpResponse(
+            json.dumps(data, separators=(',', ':'), cls=DjangoJSONEncoder),
+            content_type='application/json',
         )
 
+    def get_limit(self, request: HttpRequest):
+        limit = request.GET.get('limit')
+        if limit in (None, ''):
+            return self.paginate_by
+        try:
+            limit = int(limit)
+        except ValueError as e:
+            raise ValidationError('`limit` must be an integer.') from e
+        if limit < 1:
+            raise ValidationError('`limit` must be positive.')
+
+        return min(limit, self.max_paginate_by)
+
+    def get_queryset_for(self, key_field, search_term: str):
+        queryset = self.model_admin.get_queryset(self.request)
+
+        if search_term:
+            if self.model_admin.get_search_fields(self.request):
+                queryset, may_have_duplicates = self.model_admin.get_search_results(
+                    self.request, queryset, search_term,
+                )
+                if may_have_duplicates:
+                    queryset = queryset.distinct()
+            else:
+                try:
+                    queryset = queryset.filter(**{key_field.attname: key_field.to_python(search_term)})
+                except ValidationError:
+                    queryset = queryset.none()
+
+        return queryset.only(*self.get_loaded_fields(key_field)).order_by(key_field.attname)
+
+    def get_loaded_fields(self, key_field):
+        """Return names of columns loaded to render objects, skipping potentially large ones."""
+        return [
+            field.name
+            for field in self.model._meta.concrete_fields
+            if field == key_field or field.primary_key or not isinstance(field, self.deferred_field_types)
+        ]
+
+    @classmethod
+    def get_model_map(cls):
+        """Return mapping of model names to models, rebuilt only when app registry changes."""
+        return cls._memo.get('model_map', cls.compute_model_map)
+
+    @staticmethod
+    def compute_model_map():
+        model_map = {}
+        for _model in apps.get_models():
+            model_map.setdefault(_model.__name__, _model)
+        return model_map
+
     def process_request(self, request: HttpRequest):
         try:
             model_name = request.GET['model_name']
@@ -35,13 +122,7 @@ class DataFetcherJsonView(BaseListView):
         except KeyError as e:
             raise PermissionDenied from e
 
-        source_model = None
-        all_models = apps.get_models()
-        for _model in all_models:
-            if _model.__name__ == model_name:
-                source_model = _model
-                break
-
+        source_model = self.get_model_map().get(model_name)
         if not source_model:
             raise PermissionDenied
 
@@ -54,8 +135,14 @@ class DataFetcherJsonView(BaseListView):
         except AttributeError as e:
             raise PermissionDenied from e
 
-        model_admin = self.admin_site._registry[remote_model]
-        return remote_model, model_admin
+        try:
+            model_admin = self.admin_site._registry[remote_model]
+        except KeyError as e:
+            raise PermissionDenied from e
+
+        # composer conditions compare foreign key with its `to_field`
+        key_field = source_field.target_field if isinstance(source_field, models.ForeignKey) else remote_model._meta.pk
+        return remote_model, model_admin, key_field
 
     def has_perm(self, request: HttpRequest):
         """Check if user has permission to access the related model."""
@@ -1,57 +1,134 @@
+import hashlib
+import json
 from django.apps import apps
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.db import models
-from django.http import JsonResponse, HttpRequest
+from django.http import HttpResponse, HttpRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.generic.list import BaseListView
 
+from djangoFCM.forms.data_composer import COMPOSER_FOLLOW_REVERSE_RELATIONS
+from djangoFCM.models import PushToken
+from djangoFCM.src.conditions import EXCLUDED_FIELDS
+from djangoFCM.src.modelgraph import ModelGraphMemo
+
+# describe only models reachable from `PushToken` by relations composer follows, which are the only ones it can use
+METADATA_REACHABLE_ONLY = getattr(settings, 'DJANGOFCM_METADATA_REACHABLE_ONLY', True)
+# seconds browser may reuse metadata without revalidating it
+METADATA_MAX_AGE = getattr(settings, 'DJANGOFCM_METADATA_MAX_AGE', 3600)
+
 
 class MetadataJsonView(BaseListView):
-    """Handle DataComposer's requests for metadata."""
+    """
+    Handle DataComposer's requests for metadata.
+
+    Model graph does not change while process runs, so response body is built once per
+    app registry state and served with `ETag`, answering revalidations with 304.
+    """
     paginate_by = None
     admin_site = None
+    reachable_only = METADATA_REACHABLE_ONLY
+    follow_reverse_relations = COMPOSER_FOLLOW_REVERSE_RELATIONS
+    max_age = METADATA_MAX_AGE
+
+    _memo = ModelGraphMemo()
 
     def get(self, request, *args, **kwargs):
 
         if not self.has_perm(request):
             raise PermissionDenied
 
-        result = self.get_data()
-        return JsonResponse(
-            {
-                'results': result
-            },
-            json_dumps_params={'indent': 2}
+        content, etag = self.get_content()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+            response['ETag'] = etag
+
+        patch_cache_control(response, private=True, max_age=self.max_age)
+        return response
+
+    def get_content(self):
+        """Return serialized metadata and its ETag, computed once per app registry state."""
+        return self._memo.get(
+            (type(self), self.reachable_only, self.follow_reverse_relations),
+            self.compute_content,
         )
 
-    def get_data(self):
+    def compute_content(self):
+        content = json.dumps({'results': self.get_data()}, separators=(',', ':')).encode()
+        return content, f'"{hashlib.md5(content).hexdigest()}"'
+
+    def get_models(self):
         _models = apps.get_models()
-        result = [
+        if not self.reachable_only:
+            return _models
+
+        reachable = self.get_reachable_models()
+        # keep registry order
+        return [model for model in _models if model in reachable]
+
+    def get_reachable_models(self):
+        """Return set of models reachable from `PushToken` by followed relations, memoized like content."""
+        return self._memo.get(
+            ('reachable', type(self), self.follow_reverse_relations),
+            self.compute_reachable_models,
+        )
+
+    def compute_reachable_models(self):
+        followed_types = ('foreign-key', 'reverse-relation') if self.follow_reverse_relations else ('foreign-key',)
+        reachable = set()
+        pending = [PushToken]
+        while pending:
+            model = pending.pop()
+            if model in reachable:
+                continue
+            reachable.add(model)
+            pending.extend(
+                field.related_model
+                for field in model._meta._get_fields()
+                if self.guess_type(field) in followed_types
+            )
+
+        return frozenset(reachable)
+
+    def get_data(self, _models=None):
+        if _models is None:
+            _models = self.get_models()
+
+        return [
             {
                 'key': i,
-                'name': _models[i].__name__,
-                'fields': [
-                    {
-                        'key': ii,
-                        'name': field.name,
-                        'type': self.guess_type(field),
-                        'attributes':
-                            {
-                                'to': field.related_model.__name__
-                            } if self.guess_type(field) == 'foreign-key' else
-                            {}
-                    }
-                    for ii, field in enumerate(_models[i]._meta._get_fields())
-                ],
+                'name': model.__name__,
+                'fields': [self.get_field_data(ii, field) for ii, field in enumerate(self.get_fields(model))],
             }
             for i, model in enumerate(_models)
         ]
 
-        return result
+    @staticmethod
+    def get_fields(model):
+        """Return fields of `model` described to composer, skipping ones holding secrets."""
+        return [field for field in model._meta._get_fields() if field.name not in EXCLUDED_FIELDS]
+
+    def get_field_data(self, key, field):
+        field_type = self.guess_type(field)
+        return {
+            'key': key,
+            'name': field.name,
+            'type': field_type,
+            'attributes':
+                {
+                    'to': field.related_model.__name__
+                } if field_type in ('foreign-key', 'reverse-relation') else
+                {}
+        }
 
     @staticmethod
     def guess_type(field):
         if isinstance(field, models.ForeignKey):
             return 'foreign-key'
+        if isinstance(field, models.ForeignObjectRel):
+            return 'reverse-relation'
         return 'regular'
 
     def has_perm(self, request: HttpRequest):
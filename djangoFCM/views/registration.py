@@ -0,0 +1,115 @@
+# ******************************************************************************
+#  djangoFCM — Django app which stores, manages FCM push tokens                *
+#  and interacts with them.                                                    *
+#  Copyright (C) 2021-2021 omelched                                            *
+#                                                                              *
+#  This file is part of djangoFCM.                                             *
+#                                                                              *
+#  djangoFCM is free software: you can redistribute it and/or modify           *
+#  it under the terms of the GNU Affero General Public License as published    *
+#  by the Free Software Foundation, either version 3 of the License, or        *
+#  (at your option) any later version.                                         *
+#                                                                              *
+#  djangoFCM is distributed in the hope that it will be useful,                *
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of              *
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               *
+#  GNU Affero General Public License for more details.                         *
+#                                                                              *
+#  You should have received a copy of the GNU Affero General Public License    *
+#  along with djangoFCM.  If not, see <https://www.gnu.org/licenses/>.         *
+# ******************************************************************************
+
+import json
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import JsonResponse, HttpRequest
+from django.views import View
+
+from djangoFCM.models import PushToken
+
+# max number of tokens accepted by one registration request
+REGISTRATION_MAX_TOKENS = getattr(settings, 'DJANGOFCM_REGISTRATION_MAX_TOKENS', 1000)
+
+
+class PushTokenRegistrationJsonView(View):
+    """
+    Register batch of push tokens of authenticated user.
+
+    Expects JSON list of `{"push_token": ..., "application": <pk>}` objects; staff users may also
+    pass `"user": <pk>` to register tokens of other users. Tokens are upserted with
+    `PushToken.objects.register()`.
+    """
+    http_method_names = ['post']
+    max_tokens = REGISTRATION_MAX_TOKENS
+
+    def post(self, request, *args, **kwargs):
+
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        try:
+            registrations = self.parse(request)
+        except ValidationError as e:
+            return JsonResponse({'errors': e.messages}, status=400)
+
+        if any(str(user_id) != str(request.user.pk) for _, user_id, _ in registrations) and not request.user.is_staff:
+            raise PermissionDenied
+
+        errors = self.validate(registrations)
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+
+        changed = PushToken.objects.register(registrations)
+        return JsonResponse({'registered': len(registrations), 'changed': changed})
+
+    def parse(self, request):
+        """Return list of (`push_token`, `user_id`, `application_id`) triples from request body."""
+        try:
+            items = json.loads(request.body)
+        except ValueError as e:
+            raise ValidationError('Invalid JSON') from e
+
+        if not isinstance(items, list):
+            raise ValidationError('Expected list of push tokens')
+        if len(items) > self.max_tokens:
+            raise ValidationError(f'At most {self.max_tokens} push tokens per request are allowed')
+
+        push_token_field = PushToken._meta.get_field('push_token')
+        registrations = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get('push_token') or item.get('application') is None:
+                raise ValidationError('Every item must have "push_token" and "application"')
+            if not isinstance(item['push_token'], str) or len(item['push_token']) > push_token_field.max_length:
+                raise ValidationError(f'Invalid push token {item["push_token"]!r}')
+            for field_name in ('user', 'application'):
+                # keys must be numbers or strings, e.g. not lists or objects
+                value = item.get(field_name)
+                if value is not None and (not isinstance(value, (int, str)) or isinstance(value, bool)):
+                    raise ValidationError(f'Invalid {field_name} {value!r}')
+
+            registrations.append((item['push_token'], item.get('user', request.user.pk), item['application']))
+
+        return registrations
+
+    def validate(self, registrations):
+        """Check that referenced users and applications exist, return list of errors."""
+        errors = []
+        for field_name, pks in (
+            ('user', {user_id for _, user_id, _ in registrations}),
+            ('application', {application_id for _, _, application_id in registrations}),
+        ):
+            field = PushToken._meta.get_field(field_name)
+            try:
+                pks = {field.target_field.to_python(pk) for pk in pks}
+            except ValidationError:
+                errors.append(f'Invalid {field_name}')
+                continue
+
+            existing = set(field.related_model._default_manager.filter(pk__in=pks).values_list('pk', flat=True))
+            errors.extend(f'Unknown {field_name} {pk!r}' for pk in pks - existing)
+
+        return errors
+
+    def has_perm(self, request: HttpRequest):
+        return request.user and request.user.is_authenticated
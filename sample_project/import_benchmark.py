@@ -0,0 +1,66 @@
+"""
+Measure import time of djangoFCM and provider SDKs during Django startup.
+
+Usage (from `sample_project` directory):
+    python import_benchmark.py [--runs N]
+
+Every run starts fresh interpreter with `-X importtime`, sets Django up and
+reports import time spent in modules of listed packages and peak memory of the process.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGES = ('django', 'djangoFCM', 'django_celery_beat', 'pyfcm', 'pyhcm', 'requests', 'httpx', 'google')
+
+SETUP = (
+    'import django, resource; '
+    'django.setup(); '
+    'import djangoFCM.models, djangoFCM.admin, djangoFCM.urls; '
+    'print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+)
+
+
+def run_once():
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='sample_project.settings')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (os.getcwd(), env.get('PYTHONPATH'))))
+    result = subprocess.run(
+        (sys.executable, '-X', 'importtime', '-c', SETUP),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = dict.fromkeys(PACKAGES, 0)
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        package = name.strip().split('.')[0]
+        if package in timings:
+            timings[package] += int(own)
+
+    return timings, int(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+
+    print(f'{"package":<20}{"median import, ms":>20}')
+    for package in PACKAGES:
+        median = statistics.median(timings[package] for timings, _ in runs) / 1000
+        print(f'{package:<20}{median:>20.1f}')
+    print(f'{"peak RSS, MiB":<20}{statistics.median(rss for _, rss in runs) / 1024:>20.1f}')
+
+
+if __name__ == '__main__':
+    main()